@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк первичной настройки бота через BotFather
+
+Сравнивает две схемы на FakeBotFather (ответ приходит через --latency мс):
+• прежний диалог - пауза 2-3 с перед каждым get_response
+• автомат BotFather - ответ обрабатывается сразу после получения
+
+Настройка = создание бота (один занятый username) + установка аватара.
+С --flood N первая отправка автомата получает FloodWait на N секунд
+(прежний диалог после FloodWait завершался ошибкой, поэтому измеряется без него).
+
+Запуск: python benchmarks/botfather_setup.py [--latency N] [--flood N] [--skip-legacy]
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.botfather import BotFather
+from fake_botfather import FakeBotFather
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--latency', type=float, default=150, help='задержка ответа BotFather, мс')
+parser.add_argument('--flood', type=int, default=0, help='FloodWait на первой отправке, с')
+parser.add_argument('--skip-legacy', action='store_true', help='не измерять прежний диалог (~15 с)')
+options = parser.parse_args()
+
+TAKEN = 'taken_helper_bot'
+
+
+def usernames():
+    names = iter([TAKEN] + [f'acroka_bench_{i}_bot' for i in range(1, 10)])
+    return lambda: next(names)
+
+
+async def legacy_setup(client, image: Path) -> str:
+    """Прежняя схема: фиксированные паузы перед каждым ответом"""
+    make_username = usernames()
+    make_username()
+
+    async with client.conversation('BotFather', timeout=60) as conv:
+        for message, delay in (('/newbot', 2.5), ('Acroka Helper Bot v3', 2.5), (make_username(), 3.0)):
+            await conv.send_message(message)
+            await asyncio.sleep(delay)
+            response = await conv.get_response()
+
+    async with client.conversation('BotFather', timeout=60) as conv:
+        for message in ('/setuserpic', '@acroka_bench_1_bot', image):
+            if isinstance(message, Path):
+                await conv.send_file(message)
+            else:
+                await conv.send_message(message)
+            await asyncio.sleep(2)
+            await conv.get_response()
+    return response.text
+
+
+async def flow_setup(client, image: Path) -> str:
+    botfather = BotFather(client, backoff=0)
+    username, token = await botfather.create_bot('Acroka Helper Bot v3', usernames())
+    await botfather.set_userpic(username, image)
+    return token
+
+
+async def measure(name: str, setup, image: Path, flood_waits=()):
+    client = FakeBotFather(options.latency / 1000, list(flood_waits), taken=[TAKEN])
+    started = time.perf_counter()
+    await setup(client, image)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<22} {elapsed:7.2f} с  ({len(client.sent)} сообщений)")
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        image = Path(tmp) / 'avatar.png'
+        image.write_bytes(b'\x89PNG')
+
+        print(f"Задержка ответа: {options.latency:.0f} мс, FloodWait: {options.flood} с")
+        if not options.skip_legacy:
+            await measure('Фиксированные паузы', legacy_setup, image)
+        await measure('Автомат BotFather', flow_setup, image, [options.flood] if options.flood else [])
+
+
+asyncio.run(main())
@@ -0,0 +1,106 @@
+"""
+Локальная замена BotFather для бенчмарков
+
+FakeBotFather передается в BotFather вместо клиента и отвечает на
+диалог как настоящий BotFather через заданную задержку.
+"""
+
+import asyncio
+import secrets
+import string
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from telethon.errors import FloodWaitError
+
+
+class _FakeMessage:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeConversation:
+    """Диалог с FakeBotFather"""
+
+    def __init__(self, bot: 'FakeBotFather'):
+        self.bot = bot
+        self._responses: asyncio.Queue = asyncio.Queue()
+        self._state: Optional[str] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def _send(self, payload):
+        self.bot.sent.append(payload)
+        if self.bot.flood_waits:
+            raise FloodWaitError(request=None, capture=self.bot.flood_waits.pop(0))
+        text = self.bot.respond(self, payload)
+        asyncio.get_event_loop().call_later(self.bot.latency, self._responses.put_nowait, text)
+
+    async def send_message(self, text: str):
+        await self._send(text)
+
+    async def send_file(self, file):
+        await self._send(Path(file))
+
+    async def get_response(self, timeout: Optional[float] = None):
+        return _FakeMessage(await asyncio.wait_for(self._responses.get(), timeout))
+
+
+class FakeBotFather:
+    """Локальная замена BotFather для тестов и бенчмарков
+
+    Передается вместо клиента: conversation() отвечает как BotFather
+    через latency секунд. flood_waits - секунды FloodWait для первых
+    отправок, taken - занятые username.
+    """
+
+    def __init__(self, latency: float = 0.1, flood_waits: Optional[List[int]] = None,
+                 taken: Optional[List[str]] = None):
+        self.latency = latency
+        self.flood_waits = list(flood_waits or [])
+        self.taken = set(taken or [])
+        self.bots: Dict[str, str] = {}
+        self.sent: List[Union[str, Path]] = []
+
+    def conversation(self, peer, **kwargs) -> FakeConversation:
+        return FakeConversation(self)
+
+    @staticmethod
+    def _new_token() -> str:
+        alphabet = string.ascii_letters + string.digits
+        return f"{secrets.randbelow(10 ** 9) + 10 ** 9}:" + ''.join(
+            secrets.choice(alphabet) for _ in range(35)
+        )
+
+    def respond(self, conv: FakeConversation, payload) -> str:
+        state = conv._state
+        if payload == '/newbot':
+            conv._state = 'name'
+            return "Alright, a new bot. How are we going to call it?"
+        if payload == '/token' or payload == '/setuserpic':
+            conv._state = payload
+            return "Choose a bot."
+        if state == 'name':
+            conv._state = 'username'
+            return "Good. Now let's choose a username for your bot."
+        if state == 'username':
+            if payload in self.taken or payload in self.bots:
+                return "Sorry, this username is already taken. Please try something different."
+            self.bots[payload] = self._new_token()
+            conv._state = None
+            return f"Done! Use this token to access the HTTP API:\n{self.bots[payload]}"
+        if state == '/token':
+            conv._state = None
+            token = self.bots.get(str(payload).lstrip('@'))
+            return f"You can use this token to access HTTP API:\n{token}" if token else "Invalid bot selected."
+        if state == '/setuserpic':
+            conv._state = 'photo'
+            return "OK. Send me the new profile photo for the bot."
+        if state == 'photo' and isinstance(payload, Path):
+            conv._state = None
+            return "Success! Profile photo updated."
+        return "Unrecognized command."
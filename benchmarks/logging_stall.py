@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк задержек цикла событий при интенсивном логировании
+
+Сравнивает прямую запись (FileHandler + StreamHandler в цикле событий)
+с очередью (QueueHandler + фоновый поток QueueListener) из core/logs.py.
+Во время записи логов параллельно измеряется задержка цикла: задача
+засыпает на 1 мс и фиксирует, насколько позже она проснулась.
+
+Опция --slow-io N добавляет N мс к каждому flush файла, имитируя медленный
+накопитель (SD-карта в Termux, сетевой диск).
+
+Запуск: python benchmarks/logging_stall.py [количество_записей] [--slow-io N]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core import logs
+
+parser = argparse.ArgumentParser()
+parser.add_argument('records', type=int, nargs='?', default=20000)
+parser.add_argument('--slow-io', type=float, default=0, help='задержка flush, мс')
+options = parser.parse_args()
+
+RECORDS = options.records
+SLOW_IO = options.slow_io / 1000
+BURST = 20
+
+
+def slow_down(handler: logging.Handler):
+    """Имитация медленного накопителя"""
+    flush = handler.flush
+
+    def slow_flush():
+        flush()
+        time.sleep(SLOW_IO)
+
+    handler.flush = slow_flush
+
+
+async def measure(logger: logging.Logger) -> dict:
+    lags = []
+    running = True
+
+    async def sampler():
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - started - 0.001)
+
+    async def producer():
+        for i in range(0, RECORDS, BURST):
+            for j in range(BURST):
+                logger.info(f"Module bench handled command {i + j}")
+            await asyncio.sleep(0)
+
+    task = asyncio.ensure_future(sampler())
+    started = time.perf_counter()
+    await producer()
+    elapsed = time.perf_counter() - started
+    running = False
+    await task
+
+    lags.sort()
+    return {
+        'elapsed': elapsed,
+        'p50': lags[len(lags) // 2] * 1000,
+        'p99': lags[int(len(lags) * 0.99)] * 1000,
+        'max': lags[-1] * 1000,
+    }
+
+
+def run(use_queue: bool, directory: Path) -> dict:
+    logger = logging.getLogger(logs.LOGGER_NAME)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    stderr = sys.stderr
+    sys.stderr = open(os.devnull, 'w')
+    try:
+        logs.setup_logging(directory / f'queue_{use_queue}.log', use_queue=use_queue, compress=False)
+        handlers = logs._listener.handlers if use_queue else logger.handlers
+        if SLOW_IO:
+            for handler in handlers:
+                if isinstance(handler, logs.RotatingLogHandler):
+                    slow_down(handler)
+        result = asyncio.run(measure(logger))
+        logs.stop_logging()
+    finally:
+        sys.stderr.close()
+        sys.stderr = stderr
+    return result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Записей: {RECORDS}, пачками по {BURST}, задержка flush: {SLOW_IO * 1000:.1f} мс")
+        print(f"{'режим':>10} | {'цикл логов, с':>13} | {'лаг p50, мс':>11} | {'p99, мс':>8} | {'max, мс':>8}")
+        print('-' * 64)
+        for use_queue in (False, True):
+            r = run(use_queue, Path(tmp))
+            mode = 'очередь' if use_queue else 'прямой'
+            print(f"{mode:>10} | {r['elapsed']:>13.2f} | {r['p50']:>11.2f} | {r['p99']:>8.2f} | {r['max']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк недоступности команды при перезагрузке модуля
+
+Сравнивает две схемы:
+• выгрузка + загрузка (прежнее поведение: команды нет, пока идет
+  исполнение кода и on_load новой версии)
+• ModuleManager.reload_module - новая версия готовится рядом со старой,
+  команды подменяются одной синхронной операцией
+
+Во время перезагрузки параллельная задача непрерывно проверяет, находит
+ли роутер команду, и считает суммарное и максимальное время ее отсутствия.
+on_load тестового модуля засыпает на --on-load мс.
+
+Запуск: python benchmarks/reload_gap.py [количество_перезагрузок] [--on-load N]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+parser = argparse.ArgumentParser()
+parser.add_argument('reloads', type=int, nargs='?', default=20)
+parser.add_argument('--on-load', type=float, default=50, help='длительность on_load, мс')
+options = parser.parse_args()
+
+MODULE_SOURCE = '''
+import asyncio
+from core.modules import Module
+
+
+class GapModule(Module):
+    name = "Gap"
+    commands = {"gap": "Тестовая команда"}
+
+    async def on_load(self):
+        await asyncio.sleep(%f)
+
+    async def gap(self, event):
+        pass
+'''
+
+
+class FakeClient:
+    """Клиент без сети: роутеру нужен только add_event_handler"""
+
+    def add_event_handler(self, callback, event=None):
+        pass
+
+    def remove_event_handler(self, callback, event=None):
+        pass
+
+
+async def probe(router, stop: asyncio.Event) -> tuple:
+    """Непрерывная проверка доступности команды"""
+    total = longest = 0.0
+    missing_since = None
+
+    while not stop.is_set():
+        now = time.perf_counter()
+        if router.resolve('.gap'):
+            if missing_since is not None:
+                gap = now - missing_since
+                total += gap
+                longest = max(longest, gap)
+                missing_since = None
+        elif missing_since is None:
+            missing_since = now
+        await asyncio.sleep(0)
+
+    return total, longest
+
+
+async def measure(manager, reload_once) -> tuple:
+    stop = asyncio.Event()
+    prober = asyncio.ensure_future(probe(manager.router, stop))
+
+    started = time.perf_counter()
+    for _ in range(options.reloads):
+        await reload_once()
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - started
+
+    await asyncio.sleep(0)
+    stop.set()
+    total, longest = await prober
+    return elapsed, total, longest
+
+
+async def main():
+    from core import modules
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        modules.MODS_DIR = tmp / 'mods'
+        modules.CONFIG_DIR = tmp / 'config'
+        modules.BACKUP_DIR = tmp / 'backups'
+        modules.DEPS_MANIFEST = tmp / 'deps_manifest.json'
+        modules.MODULE_INDEX = tmp / 'module_index.json'
+        modules.LOG_FILE = tmp / 'bench.log'
+        modules.MODS_DIR.mkdir()
+        (modules.MODS_DIR / 'gap.py').write_text(MODULE_SOURCE % (options.on_load / 1000))
+
+        manager = modules.ModuleManager(FakeClient())
+        logging.getLogger('AcrokaUB').setLevel(logging.CRITICAL)
+        await manager.load_module('gap')
+
+        async def unload_load():
+            await manager.unload_module('gap')
+            await manager.load_module('gap')
+
+        async def reload():
+            await manager.reload_module('gap')
+
+        results = [
+            ('выгрузка + загрузка', await measure(manager, unload_load)),
+            ('reload_module', await measure(manager, reload)),
+        ]
+
+    print(f"\n{options.reloads} перезагрузок, on_load {options.on_load:.0f} мс\n")
+    print(f"{'схема':<22}{'всего, с':>10}{'недоступна, мс':>18}{'макс. окно, мс':>18}")
+    for label, (elapsed, total, longest) in results:
+        print(f"{label:<22}{elapsed:>10.2f}{total * 1000:>18.1f}{longest * 1000:>18.1f}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк диспетчеризации команд
+
+Сравнивает стоимость обработки одного сообщения:
+• по-старому - отдельный regex-обработчик на каждую команду
+• через CommandRouter - один обработчик и поиск по словарю
+
+Запуск: python benchmarks/router_dispatch.py
+"""
+
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.router import CommandRouter
+
+PREFIX = '.'
+MESSAGES = [
+    'просто сообщение без команды',
+    '.ping',
+    '.tr en привет мир',
+    '.cmd_last',
+]
+
+
+async def _noop(event):
+    pass
+
+
+def regex_dispatch(patterns, text):
+    """Старая схема: каждое сообщение проверяется всеми шаблонами"""
+    return [p for p in patterns if p.match(text)]
+
+
+def bench(count: int, number: int = 20000) -> tuple:
+    names = ['ping', 'tr'] + [f'cmd_{i}' for i in range(count - 3)] + ['cmd_last']
+
+    patterns = [re.compile(rf'^{re.escape(PREFIX)}{name}$') for name in names]
+    patterns[1] = re.compile(rf'^{re.escape(PREFIX)}tr (\w+) (.+)$')
+
+    router = CommandRouter(client=None, prefix=PREFIX)
+    for name in names:
+        router.add(name, _noop, r' (\w+) (.+)' if name == 'tr' else None)
+
+    regex_time = timeit.timeit(
+        lambda: [regex_dispatch(patterns, m) for m in MESSAGES], number=number
+    )
+    router_time = timeit.timeit(
+        lambda: [router.resolve(m) for m in MESSAGES], number=number
+    )
+
+    per_message = number * len(MESSAGES)
+    return regex_time / per_message * 1e6, router_time / per_message * 1e6
+
+
+def main():
+    print(f"{'команд':>8} | {'regex, мкс':>11} | {'router, мкс':>11} | {'ускорение':>9}")
+    print('-' * 50)
+    for count in (15, 50, 100, 200, 500):
+        regex_us, router_us = bench(count)
+        print(f"{count:>8} | {regex_us:>11.2f} | {router_us:>11.2f} | {regex_us / router_us:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,81 +1,115 @@
 import os
-from typing import Tuple, Optional
-from dotenv import load_dotenv
-
-load_dotenv()
+from typing import Dict, Optional, Tuple
+from dotenv import dotenv_values, load_dotenv
 
 SOURCE_FOLDER = 'source'
 CONFIG_DIR = 'config'
-os.makedirs(SOURCE_FOLDER, exist_ok=True)
-os.makedirs(CONFIG_DIR, exist_ok=True)
 
 TOKEN_FILE = os.path.join(SOURCE_FOLDER, 'token.txt')
 BOT_TOKEN_FILE = os.path.join(SOURCE_FOLDER, 'bottoken.txt')
 API_CREDENTIALS_FILE = os.path.join(CONFIG_DIR, 'api_credentials.txt')
 ENV_FILE = os.path.join(CONFIG_DIR, '.env')
 
-API_ID: str = ""
-API_HASH: str = ""
+# Старые файлы с API-данными (первые две строки: id и hash)
+LEGACY_FILES = (
+    (API_CREDENTIALS_FILE, "config/api_credentials.txt"),
+    (TOKEN_FILE, "source/token.txt")
+)
+
 BOT_TOKEN: Optional[str] = None
 
-def get_api_credentials() -> Tuple[str, str]:
-    """Получение API-данных с приоритетом: env → файл → ввод"""
-    
-    # 1. Проверяем переменные окружения
-    api_id = os.getenv('API_ID')
-    api_hash = os.getenv('API_HASH')
-    
-    if api_id and api_hash:
-        print("🔑 Используем API-данные из переменных окружения")
-        return api_id, api_hash
-    
-    # 2. Проверяем файл .env в config
-    if os.path.exists(ENV_FILE):
-        try:
-            with open(ENV_FILE, 'r') as f:
-                for line in f:
-                    if line.startswith('API_ID='):
-                        api_id = line.strip().split('=', 1)[1]
-                    elif line.startswith('API_HASH='):
-                        api_hash = line.strip().split('=', 1)[1]
-            
-            if api_id and api_hash:
-                print("🔑 Используем API-данные из config/.env")
-                return api_id, api_hash
-        except Exception as e:
-            print(f"⚠️ Ошибка чтения .env: {e}")
-    
-    # 3. Проверяем старые файлы
-    file_checks = [
-        (API_CREDENTIALS_FILE, "config/api_credentials.txt"),
-        (TOKEN_FILE, "source/token.txt")
-    ]
-    
-    for file_path, desc in file_checks:
-        if os.path.exists(file_path):
+
+class Config:
+    """Настройки, прочитанные один раз из env → config/.env → старых файлов
+
+    Импорт модуля ничего не читает и не создает: источники разбираются
+    при первом обращении к get_config() (или к config.API_ID / API_HASH),
+    ввод с клавиатуры запрашивается только если API-данных нет нигде.
+    """
+
+    def __init__(self):
+        self.values: Dict[str, str] = {}
+        self.source: Optional[str] = None
+
+    def load(self) -> 'Config':
+        """Один проход по источникам; ранние источники имеют приоритет"""
+        load_dotenv()
+        layers = [("переменных окружения", dict(os.environ))]
+
+        if os.path.exists(ENV_FILE):
             try:
-                with open(file_path, 'r') as f:
-                    lines = [line.strip() for line in f if line.strip()]
-                    if len(lines) >= 2:
-                        print(f"🔑 Используем сохраненные API-данные из {desc}")
-                        return lines[0], lines[1]
+                layers.append(("config/.env", {k: v for k, v in dotenv_values(ENV_FILE).items() if v}))
             except Exception as e:
-                print(f"⚠️ Ошибка чтения {desc}: {e}")
-    
-    # 4. Запрашиваем у пользователя
+                print(f"⚠️ Ошибка чтения .env: {e}")
+
+        for file_path, desc in LEGACY_FILES:
+            if os.path.exists(file_path):
+                try:
+                    with open(file_path, 'r') as f:
+                        lines = [line.strip() for line in f if line.strip()]
+                    if len(lines) >= 2:
+                        layers.append((desc, {'API_ID': lines[0], 'API_HASH': lines[1]}))
+                except Exception as e:
+                    print(f"⚠️ Ошибка чтения {desc}: {e}")
+
+        for desc, values in reversed(layers):
+            self.values.update(values)
+
+        # API-данные берутся парой из одного источника
+        for desc, values in layers:
+            if values.get('API_ID') and values.get('API_HASH'):
+                self.values['API_ID'], self.values['API_HASH'] = values['API_ID'], values['API_HASH']
+                self.source = desc
+                break
+        return self
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.values.get(key, default)
+
+    @property
+    def api_credentials(self) -> Tuple[str, str]:
+        """API ID и Hash (при отсутствии - запрос у пользователя)"""
+        if self.source is None:
+            self.values['API_ID'], self.values['API_HASH'] = _prompt_api_credentials()
+            self.source = 'ввода'
+        return self.values['API_ID'], self.values['API_HASH']
+
+    @property
+    def api_id(self) -> str:
+        return self.api_credentials[0]
+
+    @property
+    def api_hash(self) -> str:
+        return self.api_credentials[1]
+
+
+_config: Optional[Config] = None
+
+
+def get_config() -> Config:
+    """Общий экземпляр настроек (загружается при первом вызове)"""
+    global _config
+    if _config is None:
+        _config = Config().load()
+    return _config
+
+
+def _prompt_api_credentials() -> Tuple[str, str]:
+    """Запрос API-данных у пользователя с сохранением в config/.env"""
     print("\n" + "="*50)
     print("🔐 Требуются данные Telegram API".center(50))
     print("Получите на my.telegram.org".center(50))
     print("="*50 + "\n")
-    
+
     api_id = input("📝 Введите API ID: ").strip()
     api_hash = input("🔒 Введите API Hash: ").strip()
 
     if not (api_id and api_hash):
         raise ValueError("❌ API ID и Hash не могут быть пустыми")
-    
+
     # Сохраняем в .env
     try:
+        os.makedirs(CONFIG_DIR, exist_ok=True)
         with open(ENV_FILE, 'w') as f:
             f.write(f"API_ID={api_id}\nAPI_HASH={api_hash}\n")
         print(f"✅ Данные сохранены в {ENV_FILE}")
@@ -85,9 +119,18 @@ def get_api_credentials() -> Tuple[str, str]:
         with open(API_CREDENTIALS_FILE, 'w') as f:
             f.write(f"{api_id}\n{api_hash}")
         print(f"✅ Данные сохранены в {API_CREDENTIALS_FILE}")
-    
+
     return api_id, api_hash
 
+
+def get_api_credentials() -> Tuple[str, str]:
+    """Получение API-данных с приоритетом: env → файл → ввод"""
+    config = get_config()
+    credentials = config.api_credentials
+    print(f"🔑 Используем API-данные из {config.source}")
+    return credentials
+
+
 def get_bot_token() -> Optional[str]:
     """Получение токена бота"""
     if os.path.exists(BOT_TOKEN_FILE):
@@ -103,7 +146,14 @@ def get_bot_token() -> Optional[str]:
                         return ':'.join(parts[2:])
                     elif len(parts) >= 3:
                         return ':'.join(parts[-2:])
-    
+
     return None
 
-API_ID, API_HASH = get_api_credentials()
+
+def __getattr__(name: str):
+    """config.API_ID / config.API_HASH вычисляются при первом обращении"""
+    if name == 'API_ID':
+        return get_config().api_id
+    if name == 'API_HASH':
+        return get_config().api_hash
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
@@ -0,0 +1,190 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_KEEP_VERSIONS = 10
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+
+
+class BackupStore:
+    """Контентно-адресуемое хранилище резервных копий модулей
+
+    Файлы хранятся один раз под своим sha256 в objects/, индекс
+    index.json хранит историю версий каждого модуля (от старых к новым).
+    """
+
+    def __init__(self, root: Path, keep_versions: int = DEFAULT_KEEP_VERSIONS,
+                 max_bytes: int = DEFAULT_MAX_BYTES, compress: bool = True):
+        self.root = root
+        self.objects_dir = root / 'objects'
+        self.index_file = root / 'index.json'
+        self.keep_versions = max(1, keep_versions)
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.logger = logging.getLogger('AcrokaUB')
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, List[Dict]]] = None
+
+    @property
+    def index(self) -> Dict[str, List[Dict]]:
+        """Индекс версий, загружается при первом обращении"""
+        if self._index is None:
+            self._index = {}
+            try:
+                if self.index_file.exists():
+                    self._index = json.loads(self.index_file.read_text(encoding='utf-8'))
+            except Exception as e:
+                self.logger.error(f"Error reading backup index: {e}")
+        return self._index
+
+    def _save_index(self):
+        """Атомарная запись индекса"""
+        tmp_file = self.index_file.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps(self.index, indent=2, ensure_ascii=False), encoding='utf-8')
+        tmp_file.replace(self.index_file)
+
+    def _object_path(self, digest: str, compressed: bool) -> Path:
+        return self.objects_dir / (f"{digest}.gz" if compressed else digest)
+
+    def save(self, module_path: Path, digest: Optional[str] = None) -> Optional[str]:
+        """Сохранение версии модуля, если она отличается от последней
+
+        digest - известный sha256 файла: если он совпадает с последней
+        версией, файл не читается.
+        """
+        name = module_path.stem
+        if digest is not None:
+            with self._lock:
+                history = self.index.get(name)
+                if history and history[-1]['hash'] == digest:
+                    return None
+
+        content = module_path.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+
+        with self._lock:
+            history = self.index.setdefault(name, [])
+            if history and history[-1]['hash'] == digest:
+                return None
+
+            entry = self._find_entry(digest)
+            if entry is None:
+                self.objects_dir.mkdir(parents=True, exist_ok=True)
+                data = gzip.compress(content) if self.compress else content
+                object_path = self._object_path(digest, self.compress)
+                tmp_path = object_path.with_name(object_path.name + '.tmp')
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, object_path)
+                entry = {'compressed': self.compress, 'stored': len(data)}
+
+            history[:] = [v for v in history if v['hash'] != digest]
+            history.append({
+                'hash': digest,
+                'size': len(content),
+                'stored': entry['stored'],
+                'compressed': entry['compressed'],
+                'saved_at': datetime.now().isoformat(timespec='seconds')
+            })
+
+            self._apply_retention()
+            self._save_index()
+
+        return digest
+
+    async def save_async(self, module_path: Path, digest: Optional[str] = None) -> Optional[str]:
+        """Сохранение версии вне цикла событий"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.save, module_path, digest)
+
+    def _find_entry(self, digest: str) -> Optional[Dict]:
+        """Поиск уже сохраненного объекта с таким хэшем"""
+        for history in self.index.values():
+            for version in history:
+                if version['hash'] == digest:
+                    return version
+        return None
+
+    def _apply_retention(self):
+        """Политика хранения: N последних версий и общий лимит размера"""
+        for history in self.index.values():
+            del history[:-self.keep_versions]
+
+        if self.max_bytes:
+            # Самые старые версии удаляются первыми, последняя версия модуля - никогда
+            candidates = sorted(
+                (version['saved_at'], name, version['hash'])
+                for name, history in self.index.items()
+                for version in history[:-1]
+            )
+            while self._stored_bytes() > self.max_bytes and candidates:
+                _, name, digest = candidates.pop(0)
+                self.index[name] = [v for v in self.index[name] if v['hash'] != digest]
+
+        self._collect_garbage()
+
+    def _stored_bytes(self) -> int:
+        objects = {}
+        for history in self.index.values():
+            for version in history:
+                objects[version['hash']] = version['stored']
+        return sum(objects.values())
+
+    def _collect_garbage(self):
+        """Удаление объектов, на которые не ссылается индекс"""
+        if not self.objects_dir.exists():
+            return
+
+        referenced = set()
+        for history in self.index.values():
+            for version in history:
+                referenced.add(self._object_path(version['hash'], version['compressed']).name)
+
+        for object_path in self.objects_dir.iterdir():
+            if object_path.name not in referenced:
+                try:
+                    object_path.unlink()
+                except OSError as e:
+                    self.logger.error(f"Error removing backup object {object_path.name}: {e}")
+
+    def versions(self, name: str) -> List[Dict]:
+        """История версий модуля, от новых к старым"""
+        with self._lock:
+            return list(reversed(self.index.get(name, [])))
+
+    def modules(self) -> Dict[str, int]:
+        """Модули и количество сохраненных версий"""
+        with self._lock:
+            return {name: len(history) for name, history in sorted(self.index.items()) if history}
+
+    def read(self, version: Dict) -> bytes:
+        """Содержимое версии"""
+        data = self._object_path(version['hash'], version['compressed']).read_bytes()
+        return gzip.decompress(data) if version['compressed'] else data
+
+    def restore(self, name: str, number: int, target: Path) -> Dict:
+        """Восстановление версии (1 - самая новая) в файл модуля"""
+        versions = self.versions(name)
+        if not 1 <= number <= len(versions):
+            raise ValueError(f"Версия {number} модуля {name} не найдена")
+
+        version = versions[number - 1]
+        content = self.read(version)
+        if hashlib.sha256(content).hexdigest() != version['hash']:
+            raise ValueError(f"Резервная копия {version['hash'][:12]} повреждена")
+
+        tmp_path = target.with_name(target.name + '.tmp')
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, target)
+        return version
+
+    async def restore_async(self, name: str, number: int, target: Path) -> Dict:
+        """Восстановление версии вне цикла событий"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.restore, name, number, target)
@@ -1,16 +1,15 @@
 import asyncio
 import os
-import re
 import random
 import string
-import subprocess
-import platform
 from pathlib import Path
 from typing import Optional, Tuple
-import aiohttp
 from telethon import TelegramClient
 from telethon.errors import FloodWaitError
-from config import API_ID, API_HASH
+from config import get_api_credentials
+from core.botfather import BotFather, BotFatherError
+from core.connectivity import parse_endpoints, probe, telegram_endpoints
+from core.http import HttpClient
 
 class BotManager:
     def __init__(self):
@@ -27,15 +26,18 @@ class BotManager:
         self.MODS_DIR.mkdir(exist_ok=True)
         
         self.client = None
+        self.http = HttpClient()
         self._initialize_client()
+        self.botfather = BotFather(self.client)
     
     def _initialize_client(self):
         """Инициализация клиента Telegram"""
+        api_id, api_hash = get_api_credentials()
         try:
             self.client = TelegramClient(
-                session=f'acroka_session_{API_ID}',
-                api_id=API_ID,
-                api_hash=API_HASH,
+                session=f'acroka_session_{api_id}',
+                api_id=api_id,
+                api_hash=api_hash,
                 device_model="Acroka UserBot",
                 system_version="3.0",
                 app_version="3.0",
@@ -45,13 +47,6 @@ class BotManager:
         except Exception as e:
             raise RuntimeError(f"❌ Ошибка инициализации клиента: {e}")
     
-    async def sleep(self, delay: float = 1.0) -> None:
-        """Асинхронная задержка"""
-        try:
-            await asyncio.sleep(delay)
-        except asyncio.CancelledError:
-            raise
-    
     def get_prefix(self) -> str:
         """Получение префикса команд"""
         try:
@@ -66,61 +61,31 @@ class BotManager:
         """Создание нового бота через BotFather"""
         print("\n" + "🛠️ Создание нового бота".center(50, '─'))
         
-        async def botfather_step(conv, message: str, delay: float = 2.5) -> Optional[str]:
-            """Обработка шага диалога с BotFather"""
-            try:
-                await conv.send_message(message)
-                await self.sleep(delay)
-                response = await conv.get_response()
-                return response.text
-            except FloodWaitError as e:
-                print(f"⏳ Ожидаем {e.seconds} сек. из-за ограничений...")
-                await asyncio.sleep(e.seconds + 2)
-                return None
-            except Exception as e:
-                print(f"⚠️ Ошибка в диалоге: {e}")
-                return None
-        
         try:
-            async with self.client.conversation('BotFather', timeout=60) as conv:
-                # 1. Начало создания
-                if not await botfather_step(conv, '/newbot'):
-                    return None, None, None
-                
-                # 2. Устанавливаем имя бота
-                if not await botfather_step(conv, 'Acroka Helper Bot v3'):
-                    return None, None, None
-                
-                # 3. Генерируем username
-                username = self._generate_username()
-                response = await botfather_step(conv, username, 3.0)
-                
-                if not response:
-                    return None, None, None
-                
-                # Извлекаем токен
-                token_match = re.search(r'(\d+:[a-zA-Z0-9_-]{35})', response)
-                if token_match:
-                    token = token_match.group(1)
-                    user_id = token.split(':')[0]
-                    
-                    # Сохраняем данные
-                    if self._save_bot_data(username, user_id, token):
-                        # Пытаемся установить аватар
-                        await self._set_bot_avatar(username)
-                        
-                        print(f"\n" + "✅ БОТ СОЗДАН".center(50, '─'))
-                        print(f"👤 Username: @{username}")
-                        print(f"🆔 Bot ID: {user_id}")
-                        print(f"🔐 Token: {token[:15]}...")
-                        print("─" * 50)
-                        
-                        return username, user_id, token
-        
+            username, token = await self.botfather.create_bot('Acroka Helper Bot v3', self._generate_username)
+        except (BotFatherError, FloodWaitError) as e:
+            print(f"⚠️ Ошибка в диалоге: {e}")
+            return None, None, None
         except Exception as e:
             print(f"❌ Ошибка создания бота: {e}")
+            return None, None, None
         
-        return None, None, None
+        user_id = token.split(':')[0]
+        
+        # Сохраняем данные
+        if not self._save_bot_data(username, user_id, token):
+            return None, None, None
+        
+        # Пытаемся установить аватар
+        await self._set_bot_avatar(username)
+        
+        print(f"\n" + "✅ БОТ СОЗДАН".center(50, '─'))
+        print(f"👤 Username: @{username}")
+        print(f"🆔 Bot ID: {user_id}")
+        print(f"🔐 Token: {token[:15]}...")
+        print("─" * 50)
+        
+        return username, user_id, token
     
     def _generate_username(self) -> str:
         """Генерация уникального username"""
@@ -168,25 +133,12 @@ class BotManager:
             return False
         
         try:
-            async with self.client.conversation('BotFather', timeout=60) as conv:
-                await conv.send_message('/setuserpic')
-                await self.sleep(2)
-                await conv.get_response()
-                
-                await conv.send_message(f'@{username}')
-                await self.sleep(2)
-                await conv.get_response()
-                
-                await conv.send_file(self.BOT_IMAGE)
-                await self.sleep(2)
-                response = await conv.get_response()
-                
-                if 'Great' in response.text or 'Хорошо' in response.text:
-                    print("🖼️ Аватар успешно установлен!")
-                    return True
-                else:
-                    print("⚠️ Не удалось установить аватар")
-                    return False
+            if await self.botfather.set_userpic(username, self.BOT_IMAGE):
+                print("🖼️ Аватар успешно установлен!")
+                return True
+            else:
+                print("⚠️ Не удалось установить аватар")
+                return False
         except Exception as e:
             print(f"⚠️ Ошибка установки аватара: {e}")
             return False
@@ -196,27 +148,16 @@ class BotManager:
         print(f"\n🔍 Поиск бота @{username}...")
         
         try:
-            async with self.client.conversation('BotFather', timeout=60) as conv:
-                await conv.send_message('/token')
-                await self.sleep(2)
-                await conv.get_response()
-                
-                await conv.send_message(f'@{username}')
-                await self.sleep(2)
-                response = await conv.get_response()
-                
-                token_match = re.search(r'(\d+:[a-zA-Z0-9_-]{35})', response.text)
-                if token_match:
-                    token = token_match.group(1)
-                    user_id = token.split(':')[0]
-                    
-                    if self._save_bot_data(username, user_id, token):
-                        await self._set_bot_avatar(username)
-                        print(f"\n✅ Бот @{username} загружен!")
-                        return username, token
-        
+            token = await self.botfather.get_token(username)
         except Exception as e:
             print(f"❌ Ошибка загрузки бота: {e}")
+            return None, None
+        
+        user_id = token.split(':')[0]
+        if self._save_bot_data(username, user_id, token):
+            await self._set_bot_avatar(username)
+            print(f"\n✅ Бот @{username} загружен!")
+            return username, token
         
         return None, None
     
@@ -225,37 +166,50 @@ class BotManager:
         url = f'https://api.telegram.org/bot{token}/getMe'
         
         try:
-            async with aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as session:
-                async with session.get(url) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return data.get('ok', False)
-                    return False
+            response = await self.http.fetch(url, timeout=10)
+            if response.status == 200:
+                return response.json().get('ok', False)
+            return False
         except Exception:
             return False
     
     async def check_internet_connection(self) -> bool:
-        """Проверка интернет-соединения"""
+        """Проверка интернет-соединения (TCP до серверов Telegram)"""
+        endpoints = telegram_endpoints(self.client.session)
+        endpoints += parse_endpoints(os.environ.get('ACROKA_PROBE_ENDPOINTS', ''))
+        return await probe(endpoints) is not None
+    
+    async def _start_client(self) -> bool:
+        """Запуск клиента параллельно с проверкой соединения"""
+        check = asyncio.ensure_future(self.check_internet_connection())
+        start = asyncio.ensure_future(self.client.start())
         try:
-            param = '-n' if platform.system().lower() == 'windows' else '-c'
-            subprocess.check_output(
-                ['ping', param, '1', '8.8.8.8'],
-                stderr=subprocess.DEVNULL,
-                timeout=5
-            )
+            await asyncio.wait({check, start}, return_when=asyncio.FIRST_COMPLETED)
+            
+            # Если клиент уже подключился, сеть есть - результат проверки не важен
+            if check.done() and not check.result() and not self.client.is_connected():
+                start.cancel()
+                print("❌ Нет интернет-соединения. Проверьте подключение.")
+                return False
+            
+            try:
+                await start
+            except (OSError, ConnectionError):
+                if not await check:
+                    print("❌ Нет интернет-соединения. Проверьте подключение.")
+                    return False
+                raise
             return True
-        except Exception:
-            return False
+        finally:
+            for task in (check, start):
+                if not task.done():
+                    task.cancel()
     
     async def initialize_bot(self) -> bool:
         """Инициализация бота - основная логика"""
-        if not await self.check_internet_connection():
-            print("❌ Нет интернет-соединения. Проверьте подключение.")
+        if not await self._start_client():
             return False
         
-        await self.client.start()
         me = await self.client.get_me()
         print(f"\n👤 Авторизован как: {me.first_name} (ID: {me.id})")
         
@@ -314,7 +268,7 @@ class BotManager:
                 # Импортируем и запускаем модули
                 try:
                     from core.modules import load_modules
-                    await load_modules(self.client)
+                    await load_modules(self.client, http=self.http)
                     print("✅ Модули загружены")
                 except ImportError as e:
                     print(f"⚠️ Ошибка загрузки модулей: {e}")
@@ -333,6 +287,7 @@ class BotManager:
             import traceback
             traceback.print_exc()
         finally:
+            await self.http.close()
             if self.client and self.client.is_connected():
                 await self.client.disconnect()
                 print("\n🔌 Соединение закрыто")
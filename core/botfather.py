@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import re
+from pathlib import Path
+from typing import Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+from telethon.errors import FloodWaitError
+
+BOTFATHER = 'BotFather'
+DEFAULT_STEP_TIMEOUT = 30.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+DEFAULT_USERNAME_ATTEMPTS = 3
+# Защита от зацикливания автомата
+MAX_TRANSITIONS = 20
+
+TOKEN_PATTERN = re.compile(r'(\d+:[a-zA-Z0-9_-]{35})')
+USERPIC_SUCCESS = ('Success', 'Great', 'Хорошо', 'Готово')
+
+
+class BotFatherError(RuntimeError):
+    """Ошибка диалога с BotFather"""
+
+
+class Step(NamedTuple):
+    """Состояние диалога: что отправить и куда перейти по ответу
+
+    send(context) возвращает текст или Path файла. on_response(text, context)
+    возвращает имя следующего состояния или None, если диалог завершен.
+    """
+    send: Callable[[Dict], Union[str, Path]]
+    on_response: Callable[[str, Dict], Optional[str]]
+    timeout: Optional[float] = None
+
+
+class BotFather:
+    """Диалоги с BotFather как конечный автомат
+
+    Каждый шаг отправляет сообщение и сразу ждет ответ (без фиксированных
+    пауз) с таймаутом шага. FloodWait повторяет отправку после
+    требуемого ожидания с экспоненциальной добавкой.
+    """
+
+    def __init__(self, client, peer: str = BOTFATHER, step_timeout: float = DEFAULT_STEP_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF):
+        self.client = client
+        self.peer = peer
+        self.step_timeout = step_timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.logger = logging.getLogger('AcrokaUB')
+
+    async def _exchange(self, conv, state: str, step: Step, context: Dict) -> str:
+        """Отправка сообщения шага и ожидание ответа"""
+        payload = step.send(context)
+        timeout = step.timeout or self.step_timeout
+
+        for attempt in range(self.retries + 1):
+            try:
+                if isinstance(payload, Path):
+                    await conv.send_file(payload)
+                else:
+                    await conv.send_message(payload)
+                response = await conv.get_response(timeout=timeout)
+                return response.text or ''
+            except FloodWaitError as e:
+                if attempt == self.retries:
+                    raise
+                delay = e.seconds + self.backoff * 2 ** attempt
+                print(f"⏳ Ожидаем {delay:.0f} сек. из-за ограничений...")
+                self.logger.warning(f"BotFather flood wait at step {state}: {delay:.1f}s")
+                await asyncio.sleep(delay)
+            except asyncio.TimeoutError:
+                raise BotFatherError(f"BotFather не ответил за {timeout:g} сек. (шаг {state})") from None
+
+        raise BotFatherError(f"Шаг {state} не выполнен")
+
+    async def run(self, states: Dict[str, Step], start: str, context: Optional[Dict] = None) -> Dict:
+        """Прохождение автомата от состояния start; возвращает контекст"""
+        context = {} if context is None else context
+        state = start
+
+        async with self.client.conversation(self.peer, timeout=self.step_timeout) as conv:
+            for _ in range(MAX_TRANSITIONS):
+                step = states[state]
+                text = await self._exchange(conv, state, step, context)
+                state = step.on_response(text, context)
+                if state is None:
+                    return context
+
+        raise BotFatherError("Слишком много шагов диалога с BotFather")
+
+    @staticmethod
+    def _token(text: str) -> Optional[str]:
+        match = TOKEN_PATTERN.search(text)
+        return match.group(1) if match else None
+
+    async def create_bot(self, name: str, make_username: Callable[[], str],
+                         attempts: int = DEFAULT_USERNAME_ATTEMPTS) -> Tuple[str, str]:
+        """Создание бота: (username, token)
+
+        Если username занят, BotFather ждет другой - автомат повторяет
+        шаг с новым именем до attempts раз.
+        """
+        def on_username(text: str, context: Dict) -> Optional[str]:
+            token = self._token(text)
+            if token:
+                context['token'] = token
+                return None
+            context['attempts'] += 1
+            if context['attempts'] >= attempts:
+                raise BotFatherError(f"BotFather не принял username: {text}")
+            context['username'] = make_username()
+            return 'username'
+
+        states = {
+            'start': Step(lambda c: '/newbot', lambda text, c: 'name'),
+            'name': Step(lambda c: name, lambda text, c: 'username'),
+            'username': Step(lambda c: c['username'], on_username),
+        }
+        context = await self.run(states, 'start', {'username': make_username(), 'attempts': 0})
+        return context['username'], context['token']
+
+    async def get_token(self, username: str) -> str:
+        """Токен существующего бота"""
+        def on_token(text: str, context: Dict) -> Optional[str]:
+            context['token'] = self._token(text)
+            if not context['token']:
+                raise BotFatherError(f"Токен не получен: {text}")
+            return None
+
+        states = {
+            'start': Step(lambda c: '/token', lambda text, c: 'bot'),
+            'bot': Step(lambda c: f'@{username}', on_token),
+        }
+        return (await self.run(states, 'start'))['token']
+
+    async def set_userpic(self, username: str, image: Path) -> bool:
+        """Установка аватара бота"""
+        def on_photo(text: str, context: Dict) -> Optional[str]:
+            context['ok'] = any(word in text for word in USERPIC_SUCCESS)
+            return None
+
+        states = {
+            'start': Step(lambda c: '/setuserpic', lambda text, c: 'bot'),
+            'bot': Step(lambda c: f'@{username}', lambda text, c: 'photo'),
+            'photo': Step(lambda c: image, on_photo),
+        }
+        return (await self.run(states, 'start'))['ok']
+
@@ -0,0 +1,321 @@
+import ast
+import asyncio
+import math
+import operator
+import re
+from functools import lru_cache
+from typing import Dict, Union
+
+MAX_RESULT_BITS = 10000
+MAX_FACTORIAL = 1000
+MAX_PROD_ITEMS = 1000
+MAX_ROUND_DIGITS = 1000
+EVAL_TIMEOUT = 2.0
+
+ASSIGNMENT = re.compile(r'^\s*([A-Za-z_]\w*)\s*=(?!=)(.+)$')
+RESERVED_NAMES = {'ans'}
+
+Number = Union[int, float, complex]
+
+
+class CalcError(ValueError):
+    """Ошибка вычисления выражения"""
+
+
+class Sequence:
+    """Арифметическая прогрессия start, start + step, ... (count элементов)
+
+    Результат записи a..b. Операции с числами и агрегаты (sum, len, min,
+    max, avg) считаются по формулам, без перебора элементов.
+    """
+
+    __slots__ = ('start', 'step', 'count')
+
+    def __init__(self, start: Number, step: Number, count: int):
+        self.start = start
+        self.step = step
+        self.count = count
+
+    @classmethod
+    def inclusive(cls, start: Number, stop: Number) -> 'Sequence':
+        for value in (start, stop):
+            if not isinstance(value, (int, float)) or value != int(value):
+                raise CalcError('Границы диапазона должны быть целыми числами')
+        start, stop = int(start), int(stop)
+        step = 1 if stop >= start else -1
+        return cls(start, step, abs(stop - start) + 1)
+
+    @property
+    def last(self) -> Number:
+        return self.start + self.step * (self.count - 1)
+
+    def affine(self, scale: Number, shift: Number) -> 'Sequence':
+        # Цепочка умножений диапазона не должна наращивать числа без предела
+        return Sequence(_check_size(self.start * scale + shift), _check_size(self.step * scale), self.count)
+
+    def len(self) -> int:
+        return self.count
+
+    def sum(self) -> Number:
+        total = (self.start + self.last) * self.count
+        return total // 2 if isinstance(total, int) else total / 2
+
+    def avg(self) -> Number:
+        return (self.start + self.last) / 2
+
+    def min(self) -> Number:
+        return min(self.start, self.last)
+
+    def max(self) -> Number:
+        return max(self.start, self.last)
+
+    def prod(self) -> Number:
+        if self.count > MAX_PROD_ITEMS:
+            raise CalcError(f'prod: не более {MAX_PROD_ITEMS} элементов')
+        result = 1
+        for i in range(self.count):
+            result = _check_size(result * (self.start + self.step * i))
+        return result
+
+    def __str__(self) -> str:
+        return f'{self.start}, {self.start + self.step}, ... {self.last} ({self.count} эл.)'
+
+
+def _check_size(value):
+    if isinstance(value, int) and value.bit_length() > MAX_RESULT_BITS:
+        raise CalcError('Слишком большой результат')
+    return value
+
+
+def _pow(base, exponent):
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+        if (abs(base).bit_length() - 1) * exponent > MAX_RESULT_BITS:
+            raise CalcError('Слишком большая степень')
+    return base ** exponent
+
+
+def _mul(left, right):
+    if isinstance(left, int) and isinstance(right, int):
+        if left.bit_length() + right.bit_length() > MAX_RESULT_BITS + 1:
+            raise CalcError('Слишком большой результат')
+    return left * right
+
+
+def _factorial(n):
+    if not isinstance(n, int) or n > MAX_FACTORIAL:
+        raise CalcError(f'factorial: только целые числа до {MAX_FACTORIAL}')
+    return math.factorial(n)
+
+
+def _round(number, ndigits=None):
+    # round(1, -10**7) строит 10**(10**7) и держит GIL на секунды
+    if ndigits is not None and (not isinstance(ndigits, int) or abs(ndigits) > MAX_ROUND_DIGITS):
+        raise CalcError(f'round: число знаков - целое не больше {MAX_ROUND_DIGITS} по модулю')
+    return round(number, ndigits)
+
+
+def _aggregate(name, numbers_func):
+    def func(*args):
+        if len(args) == 1 and isinstance(args[0], Sequence):
+            return getattr(args[0], name)()
+        if any(isinstance(arg, Sequence) for arg in args):
+            raise CalcError(f'{name}: диапазон должен быть единственным аргументом')
+        return numbers_func(args)
+    return func
+
+
+def _prod(numbers):
+    result = 1
+    for number in numbers:
+        result = _mul(result, number)
+    return result
+
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _pow,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+FUNCTIONS = {
+    'abs': abs,
+    'round': _round,
+    'sqrt': math.sqrt,
+    'exp': math.exp,
+    'log': math.log,
+    'log2': math.log2,
+    'log10': math.log10,
+    'sin': math.sin,
+    'cos': math.cos,
+    'tan': math.tan,
+    'asin': math.asin,
+    'acos': math.acos,
+    'atan': math.atan,
+    'degrees': math.degrees,
+    'radians': math.radians,
+    'floor': math.floor,
+    'ceil': math.ceil,
+    'gcd': math.gcd,
+    'hypot': math.hypot,
+    'factorial': _factorial,
+    'sum': _aggregate('sum', sum),
+    'len': _aggregate('len', len),
+    'min': _aggregate('min', min),
+    'max': _aggregate('max', max),
+    'avg': _aggregate('avg', lambda args: sum(args) / len(args)),
+    'mean': _aggregate('avg', lambda args: sum(args) / len(args)),
+    'prod': _aggregate('prod', _prod),
+}
+
+CONSTANTS = {
+    'pi': math.pi,
+    'e': math.e,
+    'tau': math.tau,
+}
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expr: str) -> ast.Expression:
+    """Разбор и проверка выражения (результат кэшируется)
+
+    Запись a..b превращается в оператор @, который вычисляется как диапазон.
+    """
+    try:
+        tree = ast.parse(expr.replace('..', ' @ '), mode='eval')
+    except SyntaxError:
+        raise CalcError('Синтаксическая ошибка')
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Expression, ast.Load)):
+            continue
+        if isinstance(node, ast.BinOp):
+            if type(node.op) not in BINARY_OPERATORS and not isinstance(node.op, ast.MatMult):
+                raise CalcError(f'Недопустимый оператор: {type(node.op).__name__}')
+        elif isinstance(node, ast.UnaryOp):
+            if type(node.op) not in UNARY_OPERATORS:
+                raise CalcError(f'Недопустимый оператор: {type(node.op).__name__}')
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise CalcError('Недопустимый вызов функции')
+        elif isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                raise CalcError('Допустимы только числа')
+        elif isinstance(node, ast.Name):
+            continue
+        elif not isinstance(node, (ast.operator, ast.unaryop)):
+            raise CalcError(f'Недопустимая конструкция: {type(node).__name__}')
+
+    return tree
+
+
+class Calculator:
+    """Безопасный калькулятор на основе AST
+
+    Хранит переменные между вызовами: ans - последний результат,
+    'x = выражение' сохраняет результат в переменную x.
+    """
+
+    def __init__(self, timeout: float = EVAL_TIMEOUT):
+        self.timeout = timeout
+        self.variables: Dict[str, Number] = {}
+
+    async def calculate(self, expr: str):
+        """Вычисление выражения в пуле потоков с таймаутом
+
+        Таймаут не останавливает поток, занятый вычислением с большими
+        числами (GIL не отпускается), поэтому стоимость каждой операции
+        ограничена заранее: MAX_RESULT_BITS, MAX_FACTORIAL, MAX_ROUND_DIGITS.
+        """
+        loop = asyncio.get_event_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(None, self.evaluate, expr), self.timeout
+            )
+        except asyncio.TimeoutError:
+            raise CalcError('Превышено время вычисления')
+
+    def evaluate(self, expr: str):
+        """Вычисление выражения с сохранением результата"""
+        target = None
+        match = ASSIGNMENT.match(expr)
+        if match:
+            target, expr = match.group(1), match.group(2)
+            if target in FUNCTIONS or target in CONSTANTS or target in RESERVED_NAMES:
+                raise CalcError(f'Имя {target} зарезервировано')
+
+        result = self._eval(compile_expression(expr.strip()).body)
+        if isinstance(result, int):
+            _check_size(result)
+
+        self.variables['ans'] = result
+        if target:
+            self.variables[target] = result
+        return result
+
+    def _eval(self, node):
+        if isinstance(node, ast.Constant):
+            return node.value
+
+        if isinstance(node, ast.Name):
+            if node.id in self.variables:
+                return self.variables[node.id]
+            if node.id in CONSTANTS:
+                return CONSTANTS[node.id]
+            raise CalcError(f'Неизвестная переменная: {node.id}')
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self._eval(node.operand)
+            if isinstance(operand, Sequence):
+                if isinstance(node.op, ast.USub):
+                    return operand.affine(-1, 0)
+                return operand
+            return UNARY_OPERATORS[type(node.op)](operand)
+
+        if isinstance(node, ast.BinOp):
+            left = self._eval(node.left)
+            right = self._eval(node.right)
+            if isinstance(node.op, ast.MatMult):
+                return Sequence.inclusive(left, right)
+            if isinstance(left, Sequence) or isinstance(right, Sequence):
+                return self._sequence_op(node.op, left, right)
+            return _check_size(BINARY_OPERATORS[type(node.op)](left, right))
+
+        if isinstance(node, ast.Call):
+            args = [self._eval(arg) for arg in node.args]
+            return FUNCTIONS[node.func.id](*args)
+
+        raise CalcError(f'Недопустимая конструкция: {type(node).__name__}')
+
+    @staticmethod
+    def _sequence_op(op, left, right) -> Sequence:
+        """Поэлементные операции диапазона с числом"""
+        if isinstance(left, Sequence) and isinstance(right, Sequence):
+            raise CalcError('Операции между диапазонами не поддерживаются')
+
+        if isinstance(left, Sequence):
+            if isinstance(op, ast.Add):
+                return left.affine(1, right)
+            if isinstance(op, ast.Sub):
+                return left.affine(1, -right)
+            if isinstance(op, ast.Mult):
+                return left.affine(right, 0)
+            if isinstance(op, ast.Div):
+                return left.affine(1 / right, 0)
+        else:
+            if isinstance(op, ast.Add):
+                return right.affine(1, left)
+            if isinstance(op, ast.Sub):
+                return right.affine(-1, left)
+            if isinstance(op, ast.Mult):
+                return right.affine(left, 0)
+
+        raise CalcError('Операция не поддерживается для диапазона')
@@ -1,17 +1,35 @@
 import asyncio
+import gzip
+import html
+import importlib
+import io
 import os
 import sys
 import json
-import re
 import shutil
 import platform
 import subprocess
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Optional
-import aiohttp
-from telethon import TelegramClient, events
+from telethon import TelegramClient
 from telethon.tl.types import Message
-from googletrans import Translator
+from core.modules import BASE_DIR, MODS_DIR, CONFIG_DIR, LOG_FILE
+from core.logs import query_logs
+from core.translate import TranslationService
+from core.calc import Calculator
+from core.updater import Updater
+from core.repository import ModuleRepository, RepositoryError, git_blob_sha
+
+CORE_OWNER = 'core'
+UPDATE_CHECKOUT_DIR = BASE_DIR / 'source' / '.update'
+REPOSITORY_INDEX = CONFIG_DIR / 'repository_index.json'
+
+LOGS_INLINE_LIMIT = 3500
+LOGS_DEFAULT_TAIL = 50
+REPO_LIST_LIMIT = 60
+STATS_LIMIT = 10
 
 class CoreCommands:
     """Основные команды юзербота"""
@@ -20,84 +38,57 @@ class CoreCommands:
         self.manager = module_manager
         self.client = client
         self.prefix = module_manager.prefix
-        self.owner_id = None
+        self.identity = module_manager.identity
         self.start_time = datetime.now()
         
         # Константы
         self.REPO_URL = "https://github.com/theLuni/AcrokaUB"
         self.MODS_REPO = "https://github.com/theLuni/AcrokaUB-Modules"
         self.RAW_MODS_URL = "https://raw.githubusercontent.com/theLuni/AcrokaUB-Modules/main/"
+        self.MODS_INDEX_URL = "https://api.github.com/repos/theLuni/AcrokaUB-Modules/git/trees/main"
+        
+        mirror = os.getenv('ACROKA_MODS_MIRROR')
+        self.repository = ModuleRepository(
+            module_manager.http, self.MODS_INDEX_URL, self.RAW_MODS_URL, REPOSITORY_INDEX,
+            mirror=Path(mirror) if mirror else None
+        )
+        self.translator = TranslationService()
+        self.calculator = Calculator()
+        self.updater = Updater(self.REPO_URL, BASE_DIR, UPDATE_CHECKOUT_DIR)
         
     async def register(self):
         """Регистрация всех обработчиков команд"""
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}help$', outgoing=True))
-        async def help_handler(event):
-            await self.cmd_help(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}info$', outgoing=True))
-        async def info_handler(event):
-            await self.cmd_info(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}ping$', outgoing=True))
-        async def ping_handler(event):
-            await self.cmd_ping(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}restart$', outgoing=True))
-        async def restart_handler(event):
-            await self.cmd_restart(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}update$', outgoing=True))
-        async def update_handler(event):
-            await self.cmd_update(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}lm$', outgoing=True))
-        async def loadmod_handler(event):
-            await self.cmd_loadmod(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}ulm (\w+)$', outgoing=True))
-        async def unloadmod_handler(event):
-            await self.cmd_unloadmod(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}rlm (\w+)$', outgoing=True))
-        async def reloadmod_handler(event):
-            await self.cmd_reloadmod(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}mlist$', outgoing=True))
-        async def modlist_handler(event):
-            await self.cmd_modlist(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}dlm (\w+\.py)$', outgoing=True))
-        async def downloadmod_handler(event):
-            await self.cmd_downloadmod(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}tr (\w+) (.+)$', outgoing=True))
-        async def translate_handler(event):
-            await self.cmd_translate(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}calc (.+)$', outgoing=True))
-        async def calc_handler(event):
-            await self.cmd_calc(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}logs$', outgoing=True))
-        async def logs_handler(event):
-            await self.cmd_logs(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}cfg(?:\s+(.+))?$', outgoing=True))
-        async def config_handler(event):
-            await self.cmd_config(event)
-        
-        @self.client.on(events.NewMessage(pattern=rf'^{re.escape(self.prefix)}clean$', outgoing=True))
-        async def clean_handler(event):
-            await self.cmd_clean(event)
+        router = self.manager.router
+        
+        def add(name, handler, args=None):
+            router.add(name, handler, args, owner=CORE_OWNER)
+        
+        add('help', self.cmd_help)
+        add('info', self.cmd_info)
+        add('ping', self.cmd_ping)
+        add('restart', self.cmd_restart)
+        add('update', self.cmd_update)
+        add('lm', self.cmd_loadmod)
+        add('ulm', self.cmd_unloadmod, r' (\w+)')
+        add('rlm', self.cmd_reloadmod, r' (\w+)')
+        add('mlist', self.cmd_modlist)
+        add('dlm', self.cmd_downloadmod, r'((?: \w+\.py)+)')
+        add('repo', self.cmd_repo, r'(?: (\S+))?')
+        add('backups', self.cmd_backups, r'(?: (\w+))?')
+        add('restore', self.cmd_restore, r' (\w+)(?: (\d+))?')
+        add('tr', self.cmd_translate, r' (\w+) (.+)')
+        add('calc', self.cmd_calc, r' (.+)')
+        add('logs', self.cmd_logs, r'(?:\s+(.+))?')
+        add('cfg', self.cmd_config, r'(?:\s+(.+))?')
+        add('clean', self.cmd_clean)
+        add('stats', self.cmd_stats, r'(?: (reset))?')
     
     async def is_owner(self, event: Message) -> bool:
         """Проверка, является ли отправитель владельцем"""
-        if not self.owner_id:
-            me = await self.client.get_me()
-            self.owner_id = me.id
+        if self.identity.me is None:
+            await self.identity.refresh()
         
-        return event.sender_id == self.owner_id
+        return self.identity.is_owner(event)
     
     async def cmd_help(self, event: Message):
         """Команда помощи"""
@@ -120,16 +111,21 @@ class CoreCommands:
 • <code>{self.prefix}ulm [имя]</code> - Выгрузить модуль
 • <code>{self.prefix}rlm [имя]</code> - Перезагрузить модуль
 • <code>{self.prefix}mlist</code> - Список модулей
-• <code>{self.prefix}dlm [файл.py]</code> - Скачать модуль
+• <code>{self.prefix}dlm [файл.py ...]</code> - Скачать модули
+• <code>{self.prefix}repo [поиск]</code> - Модули в репозитории
+• <code>{self.prefix}backups [имя]</code> - Резервные копии модулей
+• <code>{self.prefix}restore [имя] [номер]</code> - Откатить модуль к версии
 
 🛠️ <b>Утилиты:</b>
 • <code>{self.prefix}tr [язык] [текст]</code> - Переводчик
 • <code>{self.prefix}calc [выражение]</code> - Калькулятор
-• <code>{self.prefix}logs</code> - Получить логи
+• <code>{self.prefix}logs [N] [уровень] [m=модуль] [since=2h] [until=10:30]</code> - Логи
 • <code>{self.prefix}clean</code> - Очистка кэша
+• <code>{self.prefix}stats [reset]</code> - Метрики производительности
 
 ⚙️ <b>Настройки:</b>
 • <code>{self.prefix}cfg prefix [префикс]</code> - Сменить префикс
+• <code>{self.prefix}cfg watch on|off</code> - Автоперезагрузка измененных модулей
 • <code>{self.prefix}cfg</code> - Показать настройки
 
 🔗 <b>Ссылки:</b>
@@ -143,7 +139,7 @@ class CoreCommands:
         if not await self.is_owner(event):
             return
         
-        me = await self.client.get_me()
+        me = self.identity.me
         uptime = datetime.now() - self.start_time
         
         # Получаем информацию о системе
@@ -199,11 +195,10 @@ class CoreCommands:
         if not await self.is_owner(event):
             return
         
-        start = datetime.now()
+        start = time.perf_counter()
         msg = await event.edit('🏓 Pong!')
-        end = datetime.now()
+        latency = (time.perf_counter() - start) * 1000
         
-        latency = (end - start).microseconds / 1000
         await msg.edit(f'🏓 Pong! | {latency:.2f}ms')
     
     async def cmd_restart(self, event: Message):
@@ -222,65 +217,60 @@ class CoreCommands:
         
         try:
             msg = await event.edit('🔄 Проверка обновлений...')
+            result = await self.updater.update()
             
-            # Временная папка
-            temp_dir = 'temp_update'
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-            
-            # Клонируем репозиторий
-            process = await asyncio.create_subprocess_shell(
-                f'git clone {self.REPO_URL} {temp_dir}',
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            await process.communicate()
-            
-            if process.returncode != 0:
-                await msg.edit('❌ Ошибка при загрузке обновлений')
+            if result['old'] == result['new']:
+                await msg.edit(f'✅ Установлена последняя версия (<code>{result["new"][:7]}</code>)', parse_mode='html')
                 return
             
-            # Копируем файлы, сохраняя source
-            exclude = {'source', '.git', '__pycache__'}
-            
-            for item in os.listdir(temp_dir):
-                if item not in exclude:
-                    src = os.path.join(temp_dir, item)
-                    dst = os.path.join('.', item)
-                    
-                    if os.path.exists(dst):
-                        if os.path.isdir(dst):
-                            shutil.rmtree(dst)
-                        else:
-                            os.remove(dst)
-                    
-                    if os.path.isdir(src):
-                        shutil.copytree(src, dst)
-                    else:
-                        shutil.copy2(src, dst)
+            response = [
+                f'✅ <b>Обновление до</b> <code>{result["new"][:7]}</code>',
+                f'📝 Изменено файлов: {len(result["changed"])}, удалено: {len(result["deleted"])}'
+            ]
+            if result['requirements'] and not result['requirements_ok']:
+                # Новый код может не запуститься без своих зависимостей
+                response.append('⚠️ Не удалось установить зависимости (подробности в .logs error)')
+                if result['restart'] or result['reload']:
+                    response.append(
+                        f'⏸ Перезагрузка отменена: установите зависимости и выполните '
+                        f'<code>{self.prefix}restart</code>'
+                    )
+                await msg.edit('\n'.join(response), parse_mode='html')
+                return
+            if result['requirements']:
+                response.append('📦 Зависимости обновлены')
             
-            # Обновляем зависимости
-            req_file = 'requirements.txt'
-            if os.path.exists(req_file):
-                await msg.edit('📦 Обновление зависимостей...')
-                
-                process = await asyncio.create_subprocess_shell(
-                    f'{sys.executable} -m pip install -r {req_file} --upgrade',
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                await process.communicate()
+            if result['restart']:
+                response.append('🔄 Перезагрузка...')
+                await msg.edit('\n'.join(response), parse_mode='html')
+                os.execl(sys.executable, sys.executable, *sys.argv)
             
-            # Очистка
-            shutil.rmtree(temp_dir)
+            if result['reload']:
+                await self._reload_core(result['reload'])
+                response.append('♻️ Команды перезагружены без перезапуска')
             
-            await msg.edit('✅ Обновление завершено! Перезагрузка...')
-            await asyncio.sleep(3)
-            os.execl(sys.executable, sys.executable, *sys.argv)
+            await msg.edit('\n'.join(response), parse_mode='html')
             
         except Exception as e:
             await event.edit(f'❌ Ошибка обновления: {str(e)}')
     
+    async def _reload_core(self, paths):
+        """Перезагрузка обновленных модулей ядра и повторная регистрация команд"""
+        # core.commands связывает Calculator и TranslationService при импорте,
+        # поэтому перезагружается всегда и последним, после своих зависимостей
+        for path in paths:
+            module = sys.modules.get(path[:-3].replace('/', '.'))
+            if module and module.__name__ != __name__:
+                importlib.reload(module)
+        
+        commands = importlib.reload(sys.modules[__name__])
+        core_cmds = commands.CoreCommands(self.manager, self.client)
+        core_cmds.start_time = self.start_time
+        
+        self.manager.router.remove_owner(CORE_OWNER)
+        await core_cmds.register()
+        self.translator.close()
+    
     async def cmd_loadmod(self, event: Message):
         """Загрузка модуля"""
         if not await self.is_owner(event):
@@ -360,21 +350,36 @@ class CoreCommands:
         modules = self.manager.list_modules()
         
         if not modules:
-            await event.edit('ℹ️ Нет загруженных модулей')
+            await event.edit('ℹ️ Нет модулей')
             return
         
-        response = [f'📦 <b>Загруженные модули ({len(modules)})</b>', '']
+        loaded = sum(1 for module in modules if module['loaded'])
+        response = [f'📦 <b>Модули (загружено {loaded} из {len(modules)})</b>', '']
         
         for module in modules:
-            uptime = datetime.now() - module['loaded_at']
-            hours = uptime.seconds // 3600
-            minutes = (uptime.seconds % 3600) // 60
+            if module['active']:
+                uptime = datetime.now() - module['loaded_at']
+                hours = uptime.seconds // 3600
+                minutes = (uptime.seconds % 3600) // 60
+                status = f'🕒 {hours}ч {minutes}м назад'
+            elif module['loaded']:
+                status = '💤 загрузится при первой команде'
+            else:
+                status = '⚪ не загружен'
             
             response.extend([
                 f'🔹 <b>{module["name"]}</b> v{module["version"]}',
                 f'   ├ <i>{module["description"][:50]}...</i>',
                 f'   ├ 👤 {module["author"]}',
-                f'   ├ 🕒 {hours}ч {minutes}м назад',
+                f'   ├ {status}',
+            ])
+            for kind, stats in module['executor'].items():
+                average = stats['time'] / max(1, stats['calls'] - stats['errors']) * 1000
+                response.append(
+                    f'   ├ ⏱ {kind}: {stats["calls"]} задач, ср. {average:.0f} мс, '
+                    f'в очереди {stats["pending"]} (макс. {stats["max_pending"]})'
+                )
+            response.extend([
                 f'   └ ⚙️ {len(module["commands"])} команд',
                 ''
             ])
@@ -383,40 +388,219 @@ class CoreCommands:
         
         await event.edit('\n'.join(response), parse_mode='html')
     
+    async def cmd_stats(self, event: Message):
+        """Метрики производительности"""
+        if not await self.is_owner(event):
+            return
+        
+        metrics = self.manager.metrics
+        if event.pattern_match.group(1):
+            metrics.reset()
+            await event.edit('🧹 Метрики сброшены')
+            return
+        
+        def ms(value: float) -> str:
+            return f'{value * 1000:.1f}'
+        
+        uptime = timedelta(seconds=int(time.time() - metrics.started))
+        lag = metrics.merged('loop_lag')
+        response = [
+            f'📊 <b>Метрики за {uptime}</b>',
+            '',
+            f'🔄 Задержка цикла: p95 {ms(lag.quantile(0.95))} мс, макс. {ms(lag.max)} мс',
+            f'⏳ FloodWait: {metrics.total("flood_waits"):g}, ошибки API: {metrics.total("api_errors"):g}',
+        ]
+        
+        scheduler = self.manager.scheduler.stats
+        if scheduler['requests']:
+            depth = ' / '.join(f'{lane} {stats["queued"]}' for lane, stats in scheduler['lanes'].items())
+            average = scheduler['wait'] / max(1, scheduler['waited'])
+            response.append(
+                f'🚦 Очередь запросов: {depth} (макс. {scheduler["max_depth"]}), '
+                f'ожидали {scheduler["waited"]} раз, ср. {ms(average)} мс, макс. {ms(scheduler["max_wait"])} мс, '
+                f'перенесено из-за FloodWait: {scheduler["flood_waits"]}'
+            )
+        
+        stalls = self.manager.watchdog.stats
+        if stalls['stalls']:
+            last = stalls['last']
+            response.append(
+                f'🐢 Блокировки цикла: {stalls["stalls"]}, макс. {stalls["max_stall"]:.2f} с '
+                f'(последняя: {last["module"] or "?"}.{last["command"] or "?"})'
+            )
+        response.append('')
+        
+        commands = sorted(metrics.histograms.get('command_time', {}).items(),
+                          key=lambda item: item[1].sum, reverse=True)
+        if commands:
+            response.append('⚙️ <b>Команды</b> (вызовы, p50/p95/макс. мс, ожидание p95):')
+        for labels, histogram in commands[:STATS_LIMIT]:
+            labels = dict(labels)
+            queue = metrics.merged('command_queue', **labels)
+            response.append(
+                f'• <code>{labels["command"]}</code> ({labels["module"]}): {histogram.count}, '
+                f'{ms(histogram.quantile(0.5))}/{ms(histogram.quantile(0.95))}/{ms(histogram.max)}, '
+                f'{ms(queue.quantile(0.95))}'
+            )
+        
+        requests = sorted(metrics.histograms.get('api_time', {}).items(),
+                          key=lambda item: item[1].count, reverse=True)
+        if requests:
+            response.extend(['', '📡 <b>Запросы API</b> (вызовы, p50/p95/макс. мс):'])
+        for labels, histogram in requests[:STATS_LIMIT]:
+            response.append(
+                f'• {dict(labels)["request"]}: {histogram.count}, '
+                f'{ms(histogram.quantile(0.5))}/{ms(histogram.quantile(0.95))}/{ms(histogram.max)}'
+            )
+        
+        await event.edit('\n'.join(response), parse_mode='html')
+    
     async def cmd_downloadmod(self, event: Message):
-        """Скачивание модуля из репозитория"""
+        """Скачивание модулей из репозитория"""
         if not await self.is_owner(event):
             return
         
-        module_file = event.pattern_match.group(1)
+        files = event.pattern_match.group(1).split()
         
         try:
-            msg = await event.edit(f'⬇️ Скачивание {module_file}...')
-            
-            url = f'{self.RAW_MODS_URL}{module_file}'
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        await msg.edit(f'❌ Модуль не найден: {module_file}')
-                        return
-                    
-                    content = await response.read()
+            msg = await event.edit(f'⬇️ Скачивание: {", ".join(files)}...')
+            results = await self.repository.download(files, MODS_DIR)
             
-            # Сохраняем файл
-            file_path = f'source/mods/{module_file}'
-            with open(file_path, 'wb') as f:
-                f.write(content)
+            response = []
+            for module_file, result in results.items():
+                module_name = os.path.splitext(module_file)[0]
+                
+                if result['status'] == 'error':
+                    response.append(f'❌ <code>{module_file}</code> - {html.escape(result["error"])}')
+                    continue
+                
+                if result['status'] == 'unchanged' and module_name in self.manager.modules:
+                    response.append(f'☑️ <code>{module_name}</code> - уже актуален')
+                    continue
+                
+                # Файл уже записан на диск целиком, теперь его можно загружать
+                if module_name in self.manager.modules or module_name in self.manager.dormant:
+                    loaded = await self.manager.reload_module(module_name)
+                else:
+                    loaded = await self.manager.load_module(module_name)
+                
+                if loaded:
+                    response.append(f'✅ <code>{module_name}</code> - установлен')
+                else:
+                    response.append(f'⚠️ <code>{module_name}</code> - скачан, но не загружен')
             
-            # Загружаем модуль
-            module_name = os.path.splitext(module_file)[0]
-            if await self.manager.load_module(module_name):
-                await msg.edit(f'✅ Модуль <code>{module_name}</code> успешно установлен!', parse_mode='html')
-            else:
-                await msg.edit(f'⚠️ Модуль скачан, но не загружен: {module_file}')
+            await msg.edit('\n'.join(response), parse_mode='html')
                 
         except Exception as e:
             await event.edit(f'❌ Ошибка: {str(e)}')
     
+    async def cmd_repo(self, event: Message):
+        """Список и поиск модулей в репозитории"""
+        if not await self.is_owner(event):
+            return
+        
+        query = event.pattern_match.group(1) or ''
+        
+        try:
+            found = await self.repository.search(query)
+        except RepositoryError as e:
+            await event.edit(f'❌ {str(e)}')
+            return
+        
+        if not found:
+            await event.edit('ℹ️ Модули не найдены')
+            return
+        
+        response = [f'🗂 <b>Модули в репозитории ({len(found)})</b>', '']
+        for module_file, entry in found[:REPO_LIST_LIMIT]:
+            local = MODS_DIR / module_file
+            if not local.exists():
+                mark = '▫️'
+            elif git_blob_sha(local.read_bytes()) == entry['sha']:
+                mark = '✅'
+            else:
+                mark = '🔄'
+            response.append(f'{mark} <code>{module_file}</code> ({entry["size"] / 1024:.1f} КБ)')
+        
+        if len(found) > REPO_LIST_LIMIT:
+            response.append(f'... и еще {len(found) - REPO_LIST_LIMIT}')
+        
+        response.extend(['', '✅ установлен ▫️ не установлен 🔄 есть обновление',
+                         f'ℹ️ <code>{self.prefix}dlm [файл.py ...]</code> - установить'])
+        await event.edit('\n'.join(response), parse_mode='html')
+    
+    async def cmd_backups(self, event: Message):
+        """Список резервных копий"""
+        if not await self.is_owner(event):
+            return
+        
+        module_name = event.pattern_match.group(1)
+        backups = self.manager.backups
+        
+        if not module_name:
+            modules = backups.modules()
+            if not modules:
+                await event.edit('ℹ️ Резервных копий нет')
+                return
+            
+            response = [f'💾 <b>Резервные копии ({len(modules)})</b>', '']
+            for name, count in modules.items():
+                response.append(f'• <code>{name}</code> - версий: {count}')
+            response.extend(['', f'ℹ️ <code>{self.prefix}backups [имя]</code> - список версий'])
+            await event.edit('\n'.join(response), parse_mode='html')
+            return
+        
+        versions = backups.versions(module_name)
+        if not versions:
+            await event.edit(f'❌ Нет копий модуля <code>{module_name}</code>', parse_mode='html')
+            return
+        
+        response = [f'💾 <b>{module_name}</b>', '']
+        for number, version in enumerate(versions, 1):
+            saved_at = version['saved_at'].replace('T', ' ')
+            mark = ' (текущая)' if number == 1 else ''
+            response.append(
+                f'{number}. <code>{version["hash"][:10]}</code> {saved_at} '
+                f'{version["size"] / 1024:.1f} КБ{mark}'
+            )
+        response.extend(['', f'↩️ <code>{self.prefix}restore {module_name} [номер]</code> - откатить'])
+        await event.edit('\n'.join(response), parse_mode='html')
+    
+    async def cmd_restore(self, event: Message):
+        """Откат модуля к резервной копии"""
+        if not await self.is_owner(event):
+            return
+        
+        module_name = event.pattern_match.group(1)
+        number = int(event.pattern_match.group(2) or 2)
+        
+        try:
+            version = await self.manager.backups.restore_async(
+                module_name, number, MODS_DIR / f'{module_name}.py'
+            )
+        except Exception as e:
+            await event.edit(f'❌ Ошибка восстановления: {str(e)}')
+            return
+        
+        was_loaded = module_name in self.manager.modules
+        if was_loaded:
+            loaded = await self.manager.reload_module(module_name)
+        else:
+            loaded = await self.manager.load_module(module_name)
+        
+        if loaded:
+            status = 'и загружен'
+        elif was_loaded:
+            # reload_module при ошибке оставляет работать старую версию
+            status = 'но новая версия не загрузилась, работает предыдущая'
+        else:
+            status = 'но не загрузился'
+        await event.edit(
+            f'{"✅" if loaded else "⚠️"} Модуль <code>{module_name}</code> восстановлен из '
+            f'<code>{version["hash"][:10]}</code> {status}',
+            parse_mode='html'
+        )
+    
     async def cmd_translate(self, event: Message):
         """Перевод текста"""
         if not await self.is_owner(event):
@@ -426,8 +610,7 @@ class CoreCommands:
         text = event.pattern_match.group(2)
         
         try:
-            translator = Translator()
-            translated = translator.translate(text, dest=target_lang)
+            translated = await self.translator.translate(text, target_lang)
             
             await event.edit(
                 f'🌐 Перевод ({translated.src} → {target_lang}):\n\n'
@@ -444,37 +627,118 @@ class CoreCommands:
         expr = event.pattern_match.group(1)
         
         try:
-            # Безопасное вычисление
-            allowed_chars = set('0123456789+-*/(). ')
-            if not all(c in allowed_chars for c in expr):
-                await event.edit('❌ Недопустимые символы в выражении')
-                return
-            
-            result = eval(expr)
+            result = await self.calculator.calculate(expr)
             await event.edit(f'🧮 {expr} = {result}')
         except Exception as e:
             await event.edit(f'❌ Ошибка вычисления: {str(e)}')
     
     async def cmd_logs(self, event: Message):
-        """Получение логов"""
+        """Получение логов
+        
+        Без аргументов отправляется весь файл. Фильтры:
+        N - последние N записей, уровень (info/warning/error),
+        m=модуль, since=/until= (30m, 2h, 1d, HH:MM, YYYY-MM-DD[THH:MM])
+        """
         if not await self.is_owner(event):
             return
         
-        log_file = 'userbot.log'
-        
-        if not os.path.exists(log_file):
+        if not LOG_FILE.exists():
             await event.edit('ℹ️ Файл логов не найден')
             return
         
+        args = event.pattern_match.group(1)
+        loop = asyncio.get_event_loop()
+        
         try:
-            await event.delete()
-            await self.client.send_file(
-                event.chat_id,
-                log_file,
-                caption='📄 Логи юзербота'
+            if not args:
+                if LOG_FILE.stat().st_size <= LOGS_INLINE_LIMIT * 4:
+                    await self.client.send_file(event.chat_id, str(LOG_FILE), caption='📄 Логи юзербота')
+                else:
+                    data = await loop.run_in_executor(None, self._compress_file, LOG_FILE)
+                    await self._send_log_archive(event, data, '📄 Логи юзербота (gzip)')
+                # Команда удаляется только после успешной отправки
+                await event.delete()
+                return
+            
+            query = self._parse_logs_args(args)
+            entries = await loop.run_in_executor(None, lambda: query_logs(LOG_FILE, **query))
+        except ValueError as e:
+            await event.edit(f'❌ {str(e)}')
+            return
+        except Exception as e:
+            await event.edit(f'❌ Ошибка отправки логов: {str(e)}')
+            return
+        
+        if not entries:
+            await event.edit('ℹ️ Подходящих записей нет')
+            return
+        
+        text = '\n'.join(entries)
+        if len(text) <= LOGS_INLINE_LIMIT:
+            await event.edit(
+                f'📄 <b>Логи ({len(entries)})</b>\n<pre>{html.escape(text)}</pre>',
+                parse_mode='html'
             )
+            return
+        
+        try:
+            data = await loop.run_in_executor(None, gzip.compress, text.encode('utf-8'))
+            await self._send_log_archive(event, data, f'📄 Логи юзербота ({len(entries)} записей)')
         except Exception as e:
             await event.edit(f'❌ Ошибка отправки логов: {str(e)}')
+            return
+        await event.delete()
+    
+    def _parse_logs_args(self, args: str) -> dict:
+        """Разбор фильтров команды .logs"""
+        query = {}
+        now = datetime.now()
+        
+        for arg in args.split():
+            key, _, value = arg.partition('=')
+            if arg.isdigit():
+                query['tail'] = int(arg)
+            elif not value and key.upper() in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'):
+                query['level'] = key.upper()
+            elif key in ('m', 'mod', 'module') and value:
+                query['module'] = value
+            elif key in ('since', 'until') and value:
+                query[key] = self._parse_log_time(value, now)
+            else:
+                raise ValueError(f'Неизвестный аргумент: {arg}')
+        
+        if 'since' not in query:
+            query.setdefault('tail', LOGS_DEFAULT_TAIL)
+        return query
+    
+    @staticmethod
+    def _parse_log_time(value: str, now: datetime) -> datetime:
+        """30m / 2h / 1d назад, HH:MM сегодня или дата ISO"""
+        units = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days'}
+        if value[:-1].isdigit() and value[-1] in units:
+            return now - timedelta(**{units[value[-1]]: int(value[:-1])})
+        
+        try:
+            if ':' in value and 'T' not in value and '-' not in value:
+                hours, minutes = value.split(':')
+                return now.replace(hour=int(hours), minute=int(minutes), second=0, microsecond=0)
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f'Неверное время: {value}')
+    
+    @staticmethod
+    def _compress_file(path) -> bytes:
+        """Потоковое сжатие файла в память"""
+        buffer = io.BytesIO()
+        with open(path, 'rb') as src, gzip.GzipFile(fileobj=buffer, mode='wb') as dst:
+            shutil.copyfileobj(src, dst)
+        return buffer.getvalue()
+    
+    async def _send_log_archive(self, event: Message, data: bytes, caption: str):
+        """Отправка логов архивом"""
+        archive = io.BytesIO(data)
+        archive.name = f'userbot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log.gz'
+        await self.client.send_file(event.chat_id, archive, caption=caption)
     
     async def cmd_config(self, event: Message):
         """Управление настройками"""
@@ -508,6 +772,19 @@ class CoreCommands:
             
             await event.edit(f'✅ Префикс изменен на: <code>{value}</code>\nПерезапустите бота для применения.', parse_mode='html')
         
+        elif setting == 'watch':
+            if value not in ('on', 'off'):
+                state = 'включена' if self.manager.watcher and self.manager.watcher.running else 'выключена'
+                await event.edit(f'ℹ️ Автоперезагрузка модулей: {state}\nИспользуйте <code>{self.prefix}cfg watch on|off</code>', parse_mode='html')
+                return
+            
+            if value == 'on':
+                self.manager.start_watcher()
+                await event.edit('✅ Автоперезагрузка модулей включена: измененные файлы в source/mods перезагружаются сами')
+            else:
+                await self.manager.stop_watcher()
+                await event.edit('✅ Автоперезагрузка модулей выключена')
+        
         else:
             await event.edit('❌ Неизвестная настройка')
     
@@ -522,6 +799,7 @@ class CoreCommands:
 
 🔄 <b>Для изменения:</b>
 • <code>{self.prefix}cfg prefix [новый]</code> - Сменить префикс
+• <code>{self.prefix}cfg watch on|off</code> - Автоперезагрузка модулей
 """
     
     async def cmd_clean(self, event: Message):
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+DEFAULT_PROBE_TIMEOUT = 5.0
+
+# Адреса дата-центров Telegram (production, порт 443)
+TELEGRAM_DCS = (
+    ('149.154.175.53', 443),
+    ('149.154.167.51', 443),
+    ('149.154.175.100', 443),
+    ('149.154.167.91', 443),
+    ('91.108.56.130', 443),
+)
+
+Endpoint = Tuple[str, int]
+
+
+def parse_endpoints(value: str) -> List[Endpoint]:
+    """Адреса из строки 'host:port, [ipv6]:port'"""
+    endpoints = []
+    for item in value.split(','):
+        host, _, port = item.strip().rpartition(':')
+        if host and port.isdigit():
+            endpoints.append((host.strip('[]'), int(port)))
+    return endpoints
+
+
+def telegram_endpoints(session=None) -> List[Endpoint]:
+    """DC из сессии клиента (первым) и остальные DC Telegram"""
+    endpoints = []
+    address = getattr(session, 'server_address', None)
+    if address:
+        endpoints.append((address, getattr(session, 'port', None) or 443))
+    endpoints.extend(dc for dc in TELEGRAM_DCS if dc not in endpoints)
+    return endpoints
+
+
+async def _connect(endpoint: Endpoint, timeout: float) -> Endpoint:
+    _, writer = await asyncio.wait_for(asyncio.open_connection(*endpoint), timeout)
+    writer.close()
+    return endpoint
+
+
+async def probe(endpoints: Iterable[Endpoint],
+                timeout: float = DEFAULT_PROBE_TIMEOUT) -> Optional[Endpoint]:
+    """Параллельные TCP-подключения к адресам
+
+    Возвращает первый ответивший адрес (остальные попытки отменяются)
+    или None, если за timeout не ответил ни один.
+    """
+    tasks = [asyncio.ensure_future(_connect(endpoint, timeout)) for endpoint in dict.fromkeys(endpoints)]
+    try:
+        for future in asyncio.as_completed(tasks):
+            try:
+                return await future
+            except (OSError, asyncio.TimeoutError) as e:
+                logging.getLogger('AcrokaUB').debug(f"Connectivity probe failed: {e!r}")
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
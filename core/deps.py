@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+DEPENDENCIES_PATTERN = re.compile(r'#\s*dependencies?:\s*(.+)')
+REQUIREMENT_NAME = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+
+class DependencyResolver:
+    """Проверка и пакетная установка pip-зависимостей модулей
+
+    Результат проверки кэшируется в манифесте по хэшу файла модуля,
+    поэтому неизмененные модули не проверяются повторно.
+    """
+
+    def __init__(self, manifest_file: Path):
+        self.manifest_file = manifest_file
+        self.logger = logging.getLogger('AcrokaUB')
+        self.manifest: Dict[str, Dict] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        """Загрузка манифеста"""
+        try:
+            if self.manifest_file.exists():
+                return json.loads(self.manifest_file.read_text(encoding='utf-8'))
+        except Exception as e:
+            self.logger.error(f"Error reading dependency manifest: {e}")
+        return {}
+
+    def _save_manifest(self):
+        """Сохранение манифеста"""
+        try:
+            self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.manifest_file.with_suffix('.tmp')
+            tmp_file.write_text(json.dumps(self.manifest, indent=2), encoding='utf-8')
+            tmp_file.replace(self.manifest_file)
+        except Exception as e:
+            self.logger.error(f"Error saving dependency manifest: {e}")
+
+    @staticmethod
+    def parse_dependencies(content: str) -> List[str]:
+        """Зависимости из комментария '# dependencies: a, b'"""
+        match = DEPENDENCIES_PATTERN.search(content)
+        if not match:
+            return []
+        return [dep.strip() for dep in match.group(1).split(',') if dep.strip()]
+
+    @staticmethod
+    def is_installed(requirement: str) -> bool:
+        """Проверка установленного пакета без запуска pip"""
+        from importlib import metadata
+
+        match = REQUIREMENT_NAME.match(requirement)
+        if not match:
+            return False
+        name = match.group(1)
+
+        try:
+            version = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            # Имя может быть именем импорта, а не дистрибутива (bs4, PIL)
+            try:
+                return importlib.util.find_spec(name) is not None
+            except (ImportError, ValueError):
+                return False
+
+        specifier = requirement[match.end():].strip()
+        if not specifier:
+            return True
+
+        try:
+            from packaging.specifiers import SpecifierSet
+            return version in SpecifierSet(specifier.split(';')[0].strip())
+        except Exception:
+            return True
+
+    async def resolve(self, paths: Iterable[Path],
+                      digests: Optional[Dict[Path, str]] = None) -> Set[Path]:
+        """Проверка зависимостей модулей и установка недостающих одним вызовом pip
+
+        Если общий вызов pip завершился ошибкой, зависимости устанавливаются
+        по модулям, и неудачными считаются только модули со своими ошибками.
+        digests - уже известные хэши файлов (из индекса модулей), позволяют
+        не читать проверенные модули. Возвращает множество модулей,
+        зависимости которых установить не удалось.
+        """
+        pending: Dict[Path, Dict] = {}
+        for path in paths:
+            if digests and digests.get(path) in self.manifest:
+                continue
+            try:
+                content = path.read_bytes()
+            except OSError as e:
+                self.logger.error(f"Error reading module {path.name}: {e}")
+                continue
+
+            digest = hashlib.sha256(content).hexdigest()
+            if digest in self.manifest:
+                continue
+
+            dependencies = self.parse_dependencies(content.decode('utf-8', errors='replace'))
+            missing = [dep for dep in dependencies if not self.is_installed(dep)]
+            pending[path] = {'hash': digest, 'dependencies': dependencies, 'missing': missing}
+
+        if not pending:
+            return set()
+
+        to_install = sorted({dep for info in pending.values() for dep in info['missing']})
+        failed: Set[Path] = set()
+
+        if to_install and not await self._pip_install(to_install):
+            # Одна неверная зависимость не должна блокировать остальные модули:
+            # после неудачи пакета каждый модуль устанавливается отдельно
+            for path, info in pending.items():
+                missing = [dep for dep in info['missing'] if not self.is_installed(dep)]
+                if missing and not await self._pip_install(missing):
+                    failed.add(path)
+
+        for path, info in pending.items():
+            if path not in failed:
+                self._remember(path, info)
+
+        self._save_manifest()
+        return failed
+
+    def _remember(self, path: Path, info: Dict):
+        """Запись успешной проверки в манифест"""
+        for digest in [d for d, entry in self.manifest.items() if entry.get('module') == path.stem]:
+            del self.manifest[digest]
+
+        self.manifest[info['hash']] = {
+            'module': path.stem,
+            'dependencies': info['dependencies'],
+            'checked_at': datetime.now().isoformat(timespec='seconds')
+        }
+
+    async def _pip_install(self, requirements: List[str]) -> bool:
+        """Установка пакетов одним вызовом pip"""
+        print(f"📦 Установка зависимостей: {', '.join(requirements)}")
+
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'pip', 'install', *requirements,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+
+        if process.returncode != 0:
+            self.logger.error(f"Dependency installation failed: {stderr.decode()}")
+            return False
+
+        importlib.invalidate_caches()
+        self.logger.info(f"Dependencies installed: {requirements}")
+        return True
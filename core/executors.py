@@ -0,0 +1,166 @@
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_THREADS = min(32, (os.cpu_count() or 1) + 4)
+DEFAULT_PROCESSES = os.cpu_count() or 1
+DEFAULT_PER_MODULE = 4
+
+THREAD = 'thread'
+CPU = 'cpu'
+
+
+class _FileFunction:
+    """Ссылка на функцию модуля, загруженного из файла
+
+    Модули из source/mods нельзя импортировать по имени в дочернем
+    процессе, поэтому функция передается как (путь, имя) и загружается там.
+    """
+
+    _loaded: Dict[Tuple[str, int], Any] = {}
+
+    def __init__(self, module_name: str, path: str, qualname: str):
+        self.module_name = module_name
+        self.path = path
+        self.qualname = qualname
+        self.mtime = os.stat(path).st_mtime_ns
+
+    def __call__(self, *args, **kwargs):
+        key = (self.path, self.mtime)
+        module = self._loaded.get(key)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(self.module_name, self.path)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[self.module_name] = module
+            spec.loader.exec_module(module)
+            self._loaded[key] = module
+
+        func = module
+        for part in self.qualname.split('.'):
+            func = getattr(func, part)
+        return func(*args, **kwargs)
+
+
+def _portable(func: Callable) -> Callable:
+    """Функция, которую можно передать в пул процессов"""
+    module = sys.modules.get(getattr(func, '__module__', None) or '')
+    path = getattr(module, '__file__', None)
+    if module is None or path is None or not module.__name__.startswith('modules.'):
+        return func
+    return _FileFunction(module.__name__, path, func.__qualname__)
+
+
+def _timed_call(func: Callable, args: tuple, kwargs: dict) -> Tuple[float, float, Any]:
+    """Вызов в пуле с отметками времени (monotonic общий для процессов)"""
+    started = time.monotonic()
+    result = func(*args, **kwargs)
+    return started, time.monotonic(), result
+
+
+class ExecutorPool:
+    """Общие пулы потоков и процессов для блокирующей и CPU-работы модулей
+
+    Каждый модуль ограничен per_module одновременными задачами каждого
+    вида, поэтому один модуль не может занять весь пул. Для каждого
+    модуля считаются задачи в очереди, время ожидания и выполнения.
+    """
+
+    def __init__(self, threads: int = DEFAULT_THREADS, processes: int = DEFAULT_PROCESSES,
+                 per_module: int = DEFAULT_PER_MODULE):
+        self.threads = max(1, threads)
+        self.processes = max(1, processes)
+        self.per_module = max(1, per_module)
+        self.logger = logging.getLogger('AcrokaUB')
+        self.stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._limits: Dict[Tuple[str, str], asyncio.Semaphore] = {}
+
+    def _executor(self, kind: str):
+        """Пул нужного вида (создается при первом использовании)"""
+        if kind == THREAD:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(self.threads, thread_name_prefix='module')
+            return self._thread_pool
+
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                self.processes, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._process_pool
+
+    async def run(self, owner: str, kind: str, func: Callable, *args, **kwargs):
+        """Выполнение func в пуле kind от имени модуля owner"""
+        key = (owner, kind)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = {
+                'calls': 0, 'errors': 0, 'pending': 0, 'max_pending': 0,
+                'wait': 0.0, 'time': 0.0, 'max_time': 0.0
+            }
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = self._limits[key] = asyncio.Semaphore(self.per_module)
+
+        loop = asyncio.get_event_loop()
+        submitted = time.monotonic()
+        stats['calls'] += 1
+        stats['pending'] += 1
+        stats['max_pending'] = max(stats['max_pending'], stats['pending'])
+        try:
+            async with limit:
+                try:
+                    started, finished, result = await loop.run_in_executor(
+                        self._executor(kind), _timed_call,
+                        _portable(func) if kind == CPU else func, args, kwargs
+                    )
+                except BrokenProcessPool:
+                    # Упавший процесс ломает весь пул - следующий вызов создаст новый
+                    self._process_pool = None
+                    raise
+        except BaseException:
+            stats['errors'] += 1
+            raise
+        finally:
+            stats['pending'] -= 1
+
+        elapsed = finished - started
+        stats['wait'] += started - submitted
+        stats['time'] += elapsed
+        stats['max_time'] = max(stats['max_time'], elapsed)
+        return result
+
+    def module_stats(self, owner: str) -> Dict[str, Dict[str, float]]:
+        """Метрики модуля по видам пулов"""
+        return {kind: dict(stats) for (name, kind), stats in self.stats.items() if name == owner}
+
+    def bind(self, owner: str) -> 'ModuleExecutor':
+        return ModuleExecutor(self, owner)
+
+    def close(self):
+        """Остановка пулов"""
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=False)
+        self._thread_pool = self._process_pool = None
+
+
+class ModuleExecutor:
+    """Доступ модуля к общим пулам от своего имени"""
+
+    def __init__(self, pool: ExecutorPool, owner: str):
+        self.pool = pool
+        self.owner = owner
+
+    async def run_blocking(self, func: Callable, *args, **kwargs):
+        return await self.pool.run(self.owner, THREAD, func, *args, **kwargs)
+
+    async def run_cpu(self, func: Callable, *args, **kwargs):
+        return await self.pool.run(self.owner, CPU, func, *args, **kwargs)
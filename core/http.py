@@ -0,0 +1,122 @@
+import json
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Mapping, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
+
+DEFAULT_LIMIT = 100
+DEFAULT_LIMIT_PER_HOST = 8
+DEFAULT_DNS_TTL = 300
+DEFAULT_TIMEOUT = 30
+DEFAULT_CACHE_SIZE = 128
+# Ответы больше этого размера не кэшируются
+MAX_CACHED_BYTES = 1024 * 1024
+USER_AGENT = 'AcrokaUB/3.0'
+
+
+class HttpResponse(NamedTuple):
+    status: int
+    body: bytes
+    headers: Mapping[str, str]
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def text(self, encoding: str = 'utf-8') -> str:
+        return self.body.decode(encoding, errors='replace')
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class HttpClient:
+    """Общий HTTP-клиент ядра и модулей
+
+    Одна сессия aiohttp с пулом keep-alive соединений, ограничением
+    соединений на хост и кэшем DNS. fetch(..., cache=True) повторяет
+    запрос с If-None-Match / If-Modified-Since и при ответе 304 отдает
+    сохраненное тело.
+    """
+
+    def __init__(self, limit: int = DEFAULT_LIMIT, limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+                 dns_ttl: int = DEFAULT_DNS_TTL, timeout: float = DEFAULT_TIMEOUT,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.logger = logging.getLogger('AcrokaUB')
+        self.stats = {'requests': 0, 'not_modified': 0}
+        self._session: Optional['aiohttp.ClientSession'] = None
+        self._cache: 'OrderedDict[str, HttpResponse]' = OrderedDict()
+
+    @property
+    def session(self) -> 'aiohttp.ClientSession':
+        """Сессия создается при первом запросе (внутри цикла событий)"""
+        if self._session is None or self._session.closed:
+            import aiohttp
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                use_dns_cache=True
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': USER_AGENT}
+            )
+        return self._session
+
+    def request(self, method: str, url: str, **kwargs):
+        """Запрос через общую сессию (используется как async with)"""
+        self.stats['requests'] += 1
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    async def fetch(self, url: str, cache: bool = False, timeout: Optional[float] = None,
+                    headers: Optional[Dict[str, str]] = None, **kwargs) -> HttpResponse:
+        """GET с чтением тела; cache=True - условный запрос по ETag/Last-Modified"""
+        headers = dict(headers or {})
+        cached = self._cache.get(url) if cache else None
+        if cached is not None:
+            if 'ETag' in cached.headers:
+                headers['If-None-Match'] = cached.headers['ETag']
+            if 'Last-Modified' in cached.headers:
+                headers['If-Modified-Since'] = cached.headers['Last-Modified']
+
+        if timeout is not None:
+            import aiohttp
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+
+        async with self.get(url, headers=headers, **kwargs) as response:
+            if response.status == 304 and cached is not None:
+                self.stats['not_modified'] += 1
+                self._cache.move_to_end(url)
+                return cached._replace(cached=True)
+
+            result = HttpResponse(response.status, await response.read(), response.headers)
+
+        if cache and result.status == 200 and len(result.body) <= MAX_CACHED_BYTES and \
+                ('ETag' in result.headers or 'Last-Modified' in result.headers):
+            self._cache[url] = result
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    async def close(self):
+        """Закрытие сессии и всех соединений"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,48 @@
+import logging
+from typing import Optional
+from telethon import TelegramClient, events
+from telethon.tl import types
+
+# Обновления, после которых данные аккаунта нужно перечитать
+ACCOUNT_UPDATES = (types.UpdateUser, types.UpdateUserName, types.UpdateUserPhone)
+
+
+class Identity:
+    """Кэш данных владельца аккаунта
+
+    Заполняется один раз при запуске и обновляется по событиям изменения
+    аккаунта, поэтому проверка владельца не требует запросов к Telegram.
+    """
+
+    def __init__(self, client: TelegramClient):
+        self.client = client
+        self.me = None
+        self.logger = logging.getLogger('AcrokaUB')
+        self._registered = False
+
+    @property
+    def id(self) -> Optional[int]:
+        return self.me.id if self.me else None
+
+    async def refresh(self):
+        """Перечитывание данных аккаунта"""
+        self.me = await self.client.get_me()
+        return self.me
+
+    def register(self):
+        """Подписка на обновления аккаунта"""
+        if not self._registered:
+            self.client.add_event_handler(self._on_update, events.Raw(ACCOUNT_UPDATES))
+            self._registered = True
+
+    async def _on_update(self, update):
+        if self.me and getattr(update, 'user_id', None) == self.me.id:
+            try:
+                await self.refresh()
+                self.logger.info("Account info refreshed")
+            except Exception as e:
+                self.logger.error(f"Error refreshing account info: {e}")
+
+    def is_owner(self, event) -> bool:
+        """Проверка, является ли отправитель владельцем"""
+        return self.me is not None and event.sender_id == self.me.id
@@ -0,0 +1,153 @@
+import ast
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.deps import DependencyResolver
+
+# Атрибуты класса модуля, которые читаются без исполнения кода
+STATIC_ATTRIBUTES = ('name', 'version', 'author', 'description', 'commands', 'dependencies', 'lazy')
+INDEX_VERSION = 1
+
+
+def _is_module_base(node: ast.expr) -> bool:
+    return (isinstance(node, ast.Name) and node.id == 'Module') or \
+        (isinstance(node, ast.Attribute) and node.attr == 'Module')
+
+
+def parse_module(source: str) -> Optional[Dict]:
+    """Метаданные модуля из исходного кода (через ast, без импорта)
+
+    Возвращает None, если в файле нет класса, наследуемого от Module
+    напрямую. static=False - атрибуты класса нельзя вычислить статически.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef) or not any(_is_module_base(b) for b in node.bases):
+            continue
+
+        meta = {
+            'class': node.name,
+            'handlers': [],
+            'requirements': DependencyResolver.parse_dependencies(source),
+            'static': True
+        }
+        for stmt in node.body:
+            if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1:
+                target, value = stmt.targets[0], stmt.value
+            elif isinstance(stmt, ast.AnnAssign) and stmt.value is not None:
+                target, value = stmt.target, stmt.value
+            elif isinstance(stmt, ast.AsyncFunctionDef):
+                meta['handlers'].append(stmt.name)
+                continue
+            else:
+                continue
+
+            if isinstance(target, ast.Name) and target.id in STATIC_ATTRIBUTES:
+                try:
+                    meta[target.id] = ast.literal_eval(value)
+                except ValueError:
+                    meta['static'] = False
+
+        if not isinstance(meta.get('commands', {}), dict):
+            meta['static'] = False
+        return meta
+
+    return None
+
+
+class ModuleIndex:
+    """Индекс метаданных модулей
+
+    Метаданные кэшируются по sha256 содержимого, а файлы - по (mtime, размер),
+    поэтому неизмененный модуль не читается и не разбирается повторно.
+    Если задан index_file, индекс сохраняется между запусками.
+    """
+
+    def __init__(self, index_file: Optional[Path] = None):
+        self.index_file = index_file
+        self.logger = logging.getLogger('AcrokaUB')
+        self._cache: Dict[str, Optional[Dict]] = {}
+        self._files: Dict[str, Dict] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        """Загрузка индекса с диска"""
+        if self.index_file is None or not self.index_file.exists():
+            return
+        try:
+            data = json.loads(self.index_file.read_text(encoding='utf-8'))
+            if data.get('version') == INDEX_VERSION:
+                self._files = data.get('files', {})
+                self._cache = data.get('meta', {})
+        except Exception as e:
+            self.logger.error(f"Error reading module index: {e}")
+
+    def prune(self):
+        """Удаление записей удаленных и переименованных модулей"""
+        stale = [key for key in self._files if not os.path.exists(key)]
+        for key in stale:
+            del self._files[key]
+        if stale:
+            self._dirty = True
+
+    def save(self):
+        """Сохранение индекса, если он изменился"""
+        if self.index_file is None:
+            return
+        self.prune()
+        if not self._dirty:
+            return
+
+        hashes = {entry['hash'] for entry in self._files.values()}
+        data = {
+            'version': INDEX_VERSION,
+            'files': self._files,
+            'meta': {digest: meta for digest, meta in self._cache.items() if digest in hashes}
+        }
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.index_file.with_suffix('.tmp')
+            tmp_file.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+            tmp_file.replace(self.index_file)
+            self._dirty = False
+        except Exception as e:
+            self.logger.error(f"Error saving module index: {e}")
+
+    def digest(self, path: Path) -> Optional[str]:
+        """sha256 файла модуля (без чтения, если файл не менялся)"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        key = str(path)
+        entry = self._files.get(key)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry['hash']
+
+        try:
+            data = path.read_bytes()
+        except OSError as e:
+            self.logger.error(f"Error reading module {path.name}: {e}")
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in self._cache:
+            self._cache[digest] = parse_module(data.decode('utf-8', errors='replace'))
+        self._files[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'hash': digest}
+        self._dirty = True
+        return digest
+
+    def get(self, path: Path) -> Optional[Dict]:
+        """Метаданные модуля; None - класс модуля ищется обычным импортом"""
+        digest = self.digest(path)
+        return self._cache.get(digest) if digest else None
@@ -0,0 +1,303 @@
+import asyncio
+import importlib.util
+import itertools
+import logging
+import multiprocessing
+import sys
+import traceback
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_WORKERS = 2
+DEFAULT_TIMEOUT = 30.0
+
+# Ссылки на объекты основного процесса в записанных действиях
+EVENT_REF = 0
+REPLY_REF = 1
+CLIENT_REF = -1
+
+# Действия, которые обработчик из процесса-воркера может выполнить в основном процессе
+MESSAGE_ACTIONS = ('edit', 'reply', 'respond', 'delete')
+CLIENT_ACTIONS = ('send_message', 'send_file')
+
+MESSAGE_FIELDS = (
+    'id', 'chat_id', 'sender_id', 'raw_text', 'text', 'out', 'date',
+    'is_private', 'is_group', 'is_channel', 'is_reply', 'reply_to_msg_id'
+)
+
+
+class IsolationError(RuntimeError):
+    """Ошибка выполнения обработчика в отдельном процессе"""
+
+
+class MatchSnapshot:
+    """Сериализуемая копия re.Match"""
+
+    def __init__(self, match):
+        self._groups = (match.group(0),) + match.groups()
+        self._named = match.groupdict()
+
+    def group(self, *indexes):
+        if not indexes:
+            return self._groups[0]
+        values = tuple(self._named[i] if isinstance(i, str) else self._groups[i] for i in indexes)
+        return values[0] if len(values) == 1 else values
+
+    def groups(self, default=None):
+        return tuple(default if g is None else g for g in self._groups[1:])
+
+    def groupdict(self, default=None):
+        return {k: default if v is None else v for k, v in self._named.items()}
+
+    def __getitem__(self, index):
+        return self.group(index)
+
+
+# Запись действий текущего вызова (в воркере вызовы выполняются по одному)
+_session: Dict[str, Any] = {}
+
+
+def _record(target: int, name: str, args: tuple, kwargs: dict, returns: bool = False):
+    result = next(_session['refs']) if returns else None
+    _session['actions'].append((target, name, args, kwargs, result))
+    return result
+
+
+class MessageSnapshot:
+    """Сериализуемая копия сообщения
+
+    В воркере edit/reply/respond/delete не выполняются, а записываются
+    и повторяются на настоящем сообщении в основном процессе.
+    """
+
+    def __init__(self, ref: int, **fields):
+        self.ref = ref
+        for field in MESSAGE_FIELDS:
+            setattr(self, field, fields.get(field))
+        self.pattern_match = fields.get('pattern_match')
+        self.reply_message: Optional['MessageSnapshot'] = fields.get('reply_message')
+
+    @classmethod
+    def from_message(cls, message, ref: int = EVENT_REF,
+                     reply_message: Optional['MessageSnapshot'] = None) -> 'MessageSnapshot':
+        match = getattr(message, 'pattern_match', None)
+        return cls(
+            ref,
+            pattern_match=MatchSnapshot(match) if match is not None else None,
+            reply_message=reply_message,
+            **{field: getattr(message, field, None) for field in MESSAGE_FIELDS}
+        )
+
+    @property
+    def message(self) -> Optional[str]:
+        return self.text
+
+    async def get_reply_message(self) -> Optional['MessageSnapshot']:
+        return self.reply_message
+
+    async def edit(self, *args, **kwargs) -> 'MessageSnapshot':
+        _record(self.ref, 'edit', args, kwargs)
+        return self
+
+    async def reply(self, *args, **kwargs) -> 'MessageSnapshot':
+        return MessageSnapshot(_record(self.ref, 'reply', args, kwargs, returns=True),
+                               chat_id=self.chat_id)
+
+    async def respond(self, *args, **kwargs) -> 'MessageSnapshot':
+        return MessageSnapshot(_record(self.ref, 'respond', args, kwargs, returns=True),
+                               chat_id=self.chat_id)
+
+    async def delete(self, *args, **kwargs):
+        _record(self.ref, 'delete', args, kwargs)
+
+
+class RecordingClient:
+    """Замена клиента в воркере: отправка сообщений записывается как действия"""
+
+    async def send_message(self, *args, **kwargs) -> MessageSnapshot:
+        return MessageSnapshot(_record(CLIENT_REF, 'send_message', args, kwargs, returns=True))
+
+    async def send_file(self, *args, **kwargs) -> MessageSnapshot:
+        return MessageSnapshot(_record(CLIENT_REF, 'send_file', args, kwargs, returns=True))
+
+    def __getattr__(self, name):
+        raise IsolationError(f"client.{name} недоступен в изолированном модуле")
+
+
+class _WorkerIdentity:
+    """Данные владельца для Module.is_owner в воркере"""
+
+    def __init__(self, owner_id: Optional[int]):
+        self.id = owner_id
+
+    def is_owner(self, event) -> bool:
+        return self.id is not None and event.sender_id == self.id
+
+
+def _load_instance(instances: Dict, request: Dict):
+    """Экземпляр модуля в воркере (импорт повторяется только при изменении файла)"""
+    key = (request['path'], request['digest'])
+    if key not in instances:
+        name = f"isolated.{Path(request['path']).stem}"
+        spec = importlib.util.spec_from_file_location(name, request['path'])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+
+        instance = getattr(module, request['class'])(RecordingClient(), request['prefix'])
+        for old_key in [k for k in instances if k[0] == request['path']]:
+            del instances[old_key]
+        instances[key] = instance
+
+    instance = instances[key]
+    instance.identity = _WorkerIdentity(request['owner_id'])
+    return instance
+
+
+async def _run_request(instances: Dict, request: Dict):
+    instance = _load_instance(instances, request)
+    handler = getattr(type(instance), request['method'])
+    await handler(instance, request['event'])
+
+
+def _worker_main(conn):
+    """Цикл процесса-воркера: один вызов обработчика за раз"""
+    instances: Dict = {}
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if request is None:
+            return
+
+        _session['actions'] = []
+        _session['refs'] = itertools.count(REPLY_REF + 1)
+        try:
+            loop.run_until_complete(_run_request(instances, request))
+            response = ('ok', _session['actions'], None)
+        except BaseException:
+            response = ('error', _session['actions'], traceback.format_exc())
+
+        try:
+            conn.send(response)
+        except Exception:
+            # Аргументы действий не сериализуются - возвращаем только ошибку
+            conn.send(('error', [], traceback.format_exc()))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+
+class IsolatedPool:
+    """Пул процессов для обработчиков изолированных модулей
+
+    Число одновременных вызовов ограничено числом воркеров. Зависший
+    воркер убивается по таймауту, упавший - заменяется новым; в обоих
+    случаях основной процесс и другие модули продолжают работать.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, timeout: float = DEFAULT_TIMEOUT):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.logger = logging.getLogger('AcrokaUB')
+        self.stats = {'calls': 0, 'timeouts': 0, 'crashes': 0, 'errors': 0}
+        self._context = multiprocessing.get_context('spawn')
+        self._idle: List[_Worker] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def run(self, module, method: str, event, module_path: Path,
+                  digest: Optional[str] = None):
+        """Выполнение обработчика method модуля module для события event"""
+        reply = None
+        if getattr(event, 'is_reply', False):
+            reply = await event.get_reply_message()
+
+        request = {
+            'path': str(module_path),
+            'digest': digest,
+            'class': type(module).__name__,
+            'prefix': module.prefix,
+            'owner_id': module.identity.id if module.identity else None,
+            'method': method,
+            'event': MessageSnapshot.from_message(
+                event, reply_message=MessageSnapshot.from_message(reply, REPLY_REF) if reply else None
+            )
+        }
+
+        status, actions, error = await self._call(request, module.isolated_timeout or self.timeout)
+        await self._replay(actions, {EVENT_REF: event, REPLY_REF: reply, CLIENT_REF: module.client})
+
+        if status == 'error':
+            self.stats['errors'] += 1
+            raise IsolationError(f"{module_path.stem}.{method} failed in worker:\n{error}")
+
+    async def _call(self, request: Dict, timeout: float) -> Tuple[str, list, Optional[str]]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+        loop = asyncio.get_event_loop()
+        async with self._semaphore:
+            worker = self._idle.pop() if self._idle else _Worker(self._context)
+            self.stats['calls'] += 1
+            try:
+                await loop.run_in_executor(None, worker.conn.send, request)
+                if not await loop.run_in_executor(None, worker.conn.poll, timeout):
+                    self.stats['timeouts'] += 1
+                    raise IsolationError(f"Handler {request['method']} timed out after {timeout} s")
+                try:
+                    response = worker.conn.recv()
+                except EOFError:
+                    self.stats['crashes'] += 1
+                    worker.process.join(1)
+                    raise IsolationError(
+                        f"Worker crashed in {request['method']} (exit code {worker.process.exitcode})"
+                    ) from None
+            except BaseException:
+                worker.kill()
+                raise
+
+            self._idle.append(worker)
+            return response
+
+    @staticmethod
+    async def _replay(actions: list, refs: Dict[int, Any]):
+        """Выполнение записанных действий на настоящих объектах"""
+        def resolve(value):
+            return refs.get(value.ref) if isinstance(value, MessageSnapshot) else value
+
+        for target, name, args, kwargs, result in actions:
+            allowed = CLIENT_ACTIONS if target == CLIENT_REF else MESSAGE_ACTIONS
+            obj = refs.get(target)
+            if obj is None or name not in allowed:
+                continue
+            value = await getattr(obj, name)(
+                *map(resolve, args), **{k: resolve(v) for k, v in kwargs.items()}
+            )
+            if result is not None:
+                refs[result] = value
+
+    def close(self):
+        """Остановка всех воркеров"""
+        while self._idle:
+            worker = self._idle.pop()
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(1)
+            if worker.process.is_alive():
+                worker.kill()
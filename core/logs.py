@@ -0,0 +1,353 @@
+import atexit
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+LOGGER_NAME = 'AcrokaUB'
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+CONSOLE_FORMAT = '%(levelname)s: %(message)s'
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_INTERVAL = 24 * 60 * 60
+DEFAULT_BACKUP_COUNT = 7
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Формат JSON lines: одна запись - один объект на строке"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        module_name = getattr(record, 'module_name', None)
+        if module_name:
+            data['module'] = module_name
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+def module_logger(module_name: str) -> logging.LoggerAdapter:
+    """Логгер AcrokaUB, помечающий записи именем модуля (поле module в JSON)"""
+    return logging.LoggerAdapter(logging.getLogger(LOGGER_NAME), {'module_name': module_name})
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, сохраняющий traceback отдельно от текста сообщения"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class RotatingLogHandler(logging.handlers.BaseRotatingHandler):
+    """Файловый обработчик с ротацией по размеру и по времени
+
+    Ротированные файлы получают суффикс с датой и (опционально) сжимаются gzip,
+    хранится не больше backup_count архивов.
+    """
+
+    def __init__(self, filename: Path, max_bytes: int = DEFAULT_MAX_BYTES,
+                 interval: float = DEFAULT_INTERVAL, backup_count: int = DEFAULT_BACKUP_COUNT,
+                 compress: bool = True, encoding: str = 'utf-8'):
+        super().__init__(str(filename), 'a', encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.rollover_at = self._next_rollover()
+
+    def _next_rollover(self) -> float:
+        if not self.interval:
+            return float('inf')
+        # Отсчет от создания текущего файла: при частых перезапусках ротация
+        # все равно происходит, просроченный файл ротируется первой же записью
+        try:
+            started = os.stat(self.baseFilename).st_mtime
+        except OSError:
+            started = time.time()
+        return started + self.interval
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if time.time() >= self.rollover_at:
+            return os.path.exists(self.baseFilename)
+
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.seek(0, 2)
+            size = len(self.format(record)) + len(self.terminator)
+            return self.stream.tell() + size >= self.max_bytes
+
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            target = f"{self.baseFilename}.{time.strftime('%Y%m%d-%H%M%S')}"
+            counter = 1
+            while os.path.exists(target) or os.path.exists(target + '.gz'):
+                target = f"{self.baseFilename}.{time.strftime('%Y%m%d-%H%M%S')}.{counter}"
+                counter += 1
+
+            os.replace(self.baseFilename, target)
+            if self.compress:
+                self._compress(target)
+            self._remove_old()
+
+        self.rollover_at = time.time() + self.interval if self.interval else float('inf')
+
+    @staticmethod
+    def _compress(path: str):
+        with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(path)
+
+    def _remove_old(self):
+        base = Path(self.baseFilename)
+        rotated = sorted(
+            base.parent.glob(base.name + '.*'),
+            key=lambda p: p.stat().st_mtime
+        )
+        for path in rotated[:-self.backup_count or None]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_number(name: str, default: float, invalid: List[str]) -> float:
+    """Неотрицательное число из переменной окружения; при ошибке - default"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        number = -1.0
+    if not 0 <= number < float('inf'):
+        invalid.append(name)
+        return default
+    return number
+
+
+def setup_logging(log_file: Path, use_queue: Optional[bool] = None, json_lines: Optional[bool] = None,
+                  max_bytes: Optional[int] = None, interval: Optional[float] = None,
+                  backup_count: Optional[int] = None, compress: Optional[bool] = None) -> logging.Logger:
+    """Настройка логгера AcrokaUB
+
+    В режиме очереди логгер только кладет записи в queue.Queue, а запись на
+    диск и в консоль выполняет фоновый поток QueueListener. Параметры, не
+    переданные явно, берутся из переменных окружения ACROKA_LOG_*.
+    """
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(logging.INFO)
+
+    if logger.handlers:
+        return logger
+
+    invalid: List[str] = []
+    if use_queue is None:
+        use_queue = _env_flag('ACROKA_LOG_QUEUE', True)
+    if json_lines is None:
+        json_lines = os.getenv('ACROKA_LOG_FORMAT', 'text').lower() == 'json'
+    if max_bytes is None:
+        max_bytes = int(_env_number('ACROKA_LOG_MAX_MB', DEFAULT_MAX_BYTES / 1024 / 1024, invalid) * 1024 * 1024)
+    if interval is None:
+        interval = _env_number('ACROKA_LOG_ROTATE_HOURS', DEFAULT_INTERVAL / 3600, invalid) * 3600
+    if backup_count is None:
+        backup_count = int(_env_number('ACROKA_LOG_BACKUPS', DEFAULT_BACKUP_COUNT, invalid))
+    if compress is None:
+        compress = _env_flag('ACROKA_LOG_COMPRESS', True)
+
+    # Файловый обработчик
+    file_handler = RotatingLogHandler(log_file, max_bytes, interval, backup_count, compress)
+    file_handler.setFormatter(JsonFormatter() if json_lines else logging.Formatter(TEXT_FORMAT))
+
+    # Консольный обработчик
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(stop_logging)
+        logger.addHandler(_QueueHandler(log_queue))
+    else:
+        logger.addHandler(file_handler)
+        logger.addHandler(console_handler)
+
+    for name in invalid:
+        logger.warning(f"Invalid {name} value, using default")
+    return logger
+
+
+def stop_logging():
+    """Остановка фонового потока логирования с записью оставшихся сообщений"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+TEXT_HEADER = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:,\d+)? - \S+ - ([A-Z]+) - ')
+READ_BLOCK = 64 * 1024
+
+
+def read_lines_reverse(path: Path, block_size: int = READ_BLOCK) -> Iterator[str]:
+    """Построчное чтение файла с конца блоками через seek"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            chunk = f.read(size) + remainder
+            lines = chunk.split(b'\n')
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.decode('utf-8', errors='replace')
+
+        if remainder:
+            yield remainder.decode('utf-8', errors='replace')
+
+
+def read_gzip_lines_reverse(path: Path) -> Iterator[str]:
+    """Построчное чтение сжатого архива с конца (архив распаковывается в память)"""
+    with gzip.open(path, 'rb') as f:
+        lines = f.read().split(b'\n')
+    for line in reversed(lines):
+        if line:
+            yield line.decode('utf-8', errors='replace')
+
+
+def rotated_logs(path: Path) -> List[Path]:
+    """Ротированные файлы лога (и архивы .gz) от новых к старым"""
+    rotated = []
+    for file in path.parent.glob(path.name + '.*'):
+        try:
+            rotated.append((file.stat().st_mtime, file))
+        except OSError:
+            pass
+    return [file for _, file in sorted(rotated, reverse=True)]
+
+
+def _parse_line(line: str) -> Optional[dict]:
+    """Разбор заголовка записи (текстовый формат или JSON lines)"""
+    if line.startswith('{'):
+        try:
+            data = json.loads(line)
+            return {
+                'ts': datetime.fromisoformat(data['ts']),
+                'level': data.get('level', 'INFO'),
+                'module': data.get('module'),
+            }
+        except (ValueError, KeyError):
+            return None
+
+    match = TEXT_HEADER.match(line)
+    if not match:
+        return None
+    return {
+        'ts': datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S'),
+        'level': match.group(2),
+        'module': None,
+    }
+
+
+def iter_entries_reverse(path: Path) -> Iterator[dict]:
+    """Записи лога от новых к старым, многострочные записи собираются целиком"""
+    continuation = []
+    lines = read_gzip_lines_reverse(path) if path.suffix == '.gz' else read_lines_reverse(path)
+    for line in lines:
+        header = _parse_line(line)
+        if header is None:
+            continuation.append(line)
+            continue
+
+        header['text'] = '\n'.join([line] + continuation[::-1])
+        continuation = []
+        yield header
+
+
+def _level_number(name: str) -> int:
+    number = logging.getLevelName(name)
+    return number if isinstance(number, int) else 0
+
+
+def query_logs(path: Path, tail: Optional[int] = None, level: Optional[str] = None,
+               since: Optional[datetime] = None, until: Optional[datetime] = None,
+               module: Optional[str] = None) -> List[str]:
+    """Выборка записей лога без чтения всего файла
+
+    Файл читается с конца, затем ротированные файлы от новых к старым;
+    чтение останавливается, как только набрано tail записей или встречена
+    запись старше since, так что архивы открываются только при
+    необходимости. Фильтр module сравнивается с полем module записей JSON,
+    а записи без него (и текстовый формат) проверяются по вхождению имени
+    в текст.
+    """
+    min_level = logging.getLevelName(level.upper()) if level else 0
+    if not isinstance(min_level, int):
+        raise ValueError(f"Неизвестный уровень: {level}")
+
+    result = []
+    files = [path] if path.exists() else []
+    entries = (entry for file in files + rotated_logs(path) for entry in iter_entries_reverse(file))
+    for entry in entries:
+        if since and entry['ts'] < since:
+            break
+        if until and entry['ts'] > until:
+            continue
+        if min_level and _level_number(entry['level']) < min_level:
+            continue
+        if module and (entry['module'] != module if entry['module'] else module not in entry['text']):
+            continue
+
+        result.append(entry['text'])
+        if tail and len(result) >= tail:
+            break
+
+    result.reverse()
+    return result
@@ -0,0 +1,244 @@
+import asyncio
+import bisect
+import contextvars
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from telethon.errors import FloodWaitError
+
+# Границы корзин гистограмм, секунды
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_LAG_INTERVAL = 0.5
+DEFAULT_EXPORT_INTERVAL = 15.0
+DEFAULT_METRICS_HOST = '127.0.0.1'
+METRIC_PREFIX = 'acroka_'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Момент получения обновления (perf_counter), выставляется для задачи обработки события
+update_received = contextvars.ContextVar('update_received', default=None)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (как в Prometheus)"""
+
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля по верхней границе корзины"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class Metrics:
+    """Метрики времени выполнения
+
+    Гистограммы: command_queue (от получения обновления до вызова
+    обработчика), command_time (время обработчика) по команде и модулю,
+    api_time по типу запроса Telegram, loop_lag. Счетчики: ошибки
+    команд, ошибки и FloodWait запросов API.
+    """
+
+    def __init__(self, lag_interval: float = DEFAULT_LAG_INTERVAL):
+        self.lag_interval = lag_interval
+        self.started = time.time()
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.logger = logging.getLogger('AcrokaUB')
+        self._tasks: List[asyncio.Task] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._client = None
+
+    def observe(self, name: str, value: float, **labels: str):
+        series = self.histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        series = self.counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + value
+
+    def total(self, name: str) -> float:
+        return sum(self.counters.get(name, {}).values())
+
+    def merged(self, name: str, **labels: str) -> Histogram:
+        """Сумма гистограмм name по сериям, подходящим под labels"""
+        result = Histogram()
+        for key, histogram in self.histograms.get(name, {}).items():
+            if all(dict(key).get(k) == v for k, v in labels.items()):
+                result.counts = [a + b for a, b in zip(result.counts, histogram.counts)]
+                result.count += histogram.count
+                result.sum += histogram.sum
+                result.max = max(result.max, histogram.max)
+        return result
+
+    def reset(self):
+        self.histograms.clear()
+        self.counters.clear()
+        self.started = time.time()
+
+    # --- Источники данных ---
+
+    def instrument(self, client):
+        """Замер запросов API и времени получения обновлений клиента"""
+        if self._client is not None:
+            return
+        self._client = client
+        call = client._call
+        dispatch_update = client._dispatch_update
+
+        async def timed_call(sender, request, ordered=False, flood_sleep_threshold=None):
+            first = request[0] if isinstance(request, (list, tuple)) and request else request
+            name = type(first).__name__
+            constructor = getattr(first, 'CONSTRUCTOR_ID', None)
+            flood_due = client._flood_waited_requests.get(constructor)
+            started = time.perf_counter()
+            raised_flood = False
+            try:
+                return await call(sender, request, ordered, flood_sleep_threshold)
+            except FloodWaitError:
+                raised_flood = True
+                self.inc('flood_waits', request=name)
+                raise
+            except Exception:
+                self.inc('api_errors', request=name)
+                raise
+            finally:
+                self.observe('api_time', time.perf_counter() - started, request=name)
+                # Короткий FloodWait Telethon пережидает сам и только запоминает его срок;
+                # удаление истекшей записи при следующем вызове - не новый FloodWait
+                flood_until = client._flood_waited_requests.get(constructor)
+                if not raised_flood and flood_until is not None and flood_until != flood_due:
+                    self.inc('flood_waits', request=name)
+
+        async def received(coroutine, stamp: float):
+            update_received.set(stamp)
+            return await coroutine
+
+        def timed_dispatch_update(update, *args, **kwargs):
+            # Вызывается синхронно в цикле обновлений - это и есть момент получения
+            return received(dispatch_update(update, *args, **kwargs), time.perf_counter())
+
+        client._call = timed_call
+        client._dispatch_update = timed_dispatch_update
+
+    async def _sample_lag(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            expected = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            self.observe('loop_lag', max(0.0, loop.time() - expected))
+
+    # --- Экспорт ---
+
+    def render_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        def labels_text(labels: Labels, extra: str = '') -> str:
+            items = [f'{k}="{v}"' for k, v in labels] + ([extra] if extra else [])
+            return '{' + ','.join(items) + '}' if items else ''
+
+        lines = [f'# TYPE {METRIC_PREFIX}uptime_seconds gauge',
+                 f'{METRIC_PREFIX}uptime_seconds {time.time() - self.started:.3f}']
+        for name, series in sorted(self.counters.items()):
+            lines.append(f'# TYPE {METRIC_PREFIX}{name}_total counter')
+            for labels, value in sorted(series.items()):
+                lines.append(f'{METRIC_PREFIX}{name}_total{labels_text(labels)} {value:g}')
+
+        for name, series in sorted(self.histograms.items()):
+            metric = f'{METRIC_PREFIX}{name}_seconds'
+            lines.append(f'# TYPE {metric} histogram')
+            for labels, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == float('inf') else f'le="{bound:g}"'
+                    lines.append(f'{metric}_bucket{labels_text(labels, le)} {cumulative}')
+                lines.append(f'{metric}_sum{labels_text(labels)} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{labels_text(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_file(self, path: str):
+        """Атомарная запись (для textfile-коллектора node_exporter)"""
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    async def _export_file(self, path: str, interval: float):
+        while True:
+            try:
+                self.write_file(path)
+            except OSError as e:
+                self.logger.error(f"Error writing metrics file: {e}")
+            await asyncio.sleep(interval)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            path = request_line.split()[1] if len(request_line.split()) > 1 else b'/'
+            if path == b'/metrics':
+                status, body = '200 OK', self.render_prometheus().encode()
+            else:
+                status, body = '404 Not Found', b'not found\n'
+            writer.write(
+                f'HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n'
+                f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, file: Optional[str] = None, port: Optional[int] = None,
+                    host: str = DEFAULT_METRICS_HOST, interval: float = DEFAULT_EXPORT_INTERVAL):
+        """Запуск замера задержки цикла и экспорта (файл и/или HTTP /metrics)"""
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.ensure_future(self._sample_lag()))
+        if file:
+            self._tasks.append(asyncio.ensure_future(self._export_file(file, interval)))
+        if port:
+            self._server = await asyncio.start_server(self._serve, host, port)
+            self.logger.info(f"Metrics endpoint: http://{host}:{port}/metrics")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
@@ -1,17 +1,29 @@
 import asyncio
+import functools
 import os
 import sys
 import json
-import re
-import shutil
 import importlib
 import inspect
+import time
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime
-import aiohttp
-from telethon import TelegramClient, events
+from telethon import TelegramClient
 from telethon.tl.types import Message
+from core.router import CommandRouter
+from core.deps import DependencyResolver
+from core.backups import BackupStore
+from core.logs import module_logger, setup_logging
+from core.identity import Identity
+from core.watcher import ModuleWatcher
+from core.index import ModuleIndex
+from core.isolation import IsolatedPool, DEFAULT_WORKERS as DEFAULT_ISOLATED_WORKERS
+from core.executors import ExecutorPool, ModuleExecutor
+from core.http import HttpClient
+from core.metrics import DEFAULT_METRICS_HOST, Metrics
+from core.scheduler import DEFAULT_CHAT_RATE, DEFAULT_GLOBAL_RATE, RequestScheduler
+from core.watchdog import LoopWatchdog, DEFAULT_THRESHOLD as DEFAULT_STALL_THRESHOLD
 
 # Константы
 BASE_DIR = Path(__file__).parent.parent
@@ -20,11 +32,11 @@ CONFIG_DIR = BASE_DIR / 'config'
 LOG_FILE = BASE_DIR / 'userbot.log'
 PREFIX_FILE = BASE_DIR / 'source' / 'prefix.txt'
 DEFAULT_PREFIX = '.'
+DEFAULT_LOAD_CONCURRENCY = 4
+DEFAULT_IDLE_TTL = 0
 BACKUP_DIR = BASE_DIR / 'source' / 'backups'
-
-# Создаем необходимые директории
-for dir_path in [MODS_DIR, CONFIG_DIR, BACKUP_DIR]:
-    dir_path.mkdir(exist_ok=True, parents=True)
+DEPS_MANIFEST = CONFIG_DIR / 'deps_manifest.json'
+MODULE_INDEX = CONFIG_DIR / 'module_index.json'
 
 class Module:
     """Базовый класс для модулей"""
@@ -34,12 +46,44 @@ class Module:
     description: str = "No description provided"
     commands: Dict[str, str] = {}
     dependencies: List[str] = []
+    identity: Optional[Identity] = None
+    executor: Optional[ModuleExecutor] = None
+    # Общий HTTP-клиент (пул соединений, кэш DNS и ответов)
+    http: Optional[HttpClient] = None
+    # False - модуль всегда загружается при старте, даже в ленивом режиме
+    lazy: bool = True
+    # True - обработчики команд выполняются в отдельном процессе
+    isolated: bool = False
+    # Таймаут изолированного обработчика (None - значение пула)
+    isolated_timeout: Optional[float] = None
     
     def __init__(self, client: TelegramClient, prefix: str):
         self.client = client
         self.prefix = prefix
         self.handlers = []
     
+    def is_owner(self, event) -> bool:
+        """Проверка, является ли отправитель владельцем"""
+        return self.identity is not None and self.identity.is_owner(event)
+    
+    async def run_blocking(self, func, *args, **kwargs):
+        """Выполнение блокирующей функции (requests, PIL, subprocess) в общем пуле потоков"""
+        if self.executor is None:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+        return await self.executor.run_blocking(func, *args, **kwargs)
+    
+    async def run_cpu(self, func, *args, **kwargs):
+        """Выполнение CPU-функции в общем пуле процессов
+        
+        func должна быть функцией уровня модуля, аргументы и результат -
+        сериализуемыми через pickle.
+        """
+        if self.executor is None:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+        return await self.executor.run_cpu(func, *args, **kwargs)
+    
     async def on_load(self):
         """Вызывается при загрузке модуля"""
         pass
@@ -51,11 +95,51 @@ class Module:
 class ModuleManager:
     """Менеджер модулей"""
     
-    def __init__(self, client: TelegramClient):
+    def __init__(self, client: TelegramClient, load_concurrency: int = DEFAULT_LOAD_CONCURRENCY,
+                 identity: Optional[Identity] = None, lazy: bool = False,
+                 idle_ttl: float = DEFAULT_IDLE_TTL,
+                 isolated_workers: int = DEFAULT_ISOLATED_WORKERS,
+                 http: Optional[HttpClient] = None):
+        # Создаем необходимые директории (не при импорте - модуль импортируют и воркеры)
+        for dir_path in [MODS_DIR, CONFIG_DIR, BACKUP_DIR]:
+            dir_path.mkdir(exist_ok=True, parents=True)
+        
         self.client = client
+        self.identity = identity or Identity(client)
         self.modules: Dict[str, Dict] = {}
+        # Ленивые модули: команды зарегистрированы, код не загружен
+        self.dormant: Dict[str, Dict] = {}
+        self.lazy = lazy
+        self.idle_ttl = idle_ttl
+        self.index = ModuleIndex(MODULE_INDEX)
+        self._activating: Dict[str, asyncio.Future] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self.load_concurrency = max(1, load_concurrency)
+        self.load_timings: Dict[str, Dict[str, float]] = {}
+        # Время фаз запуска (для main.py --profile-startup)
+        self.startup_timings: Dict[str, float] = {}
         self.prefix = self._load_prefix()
         self.logger = self._setup_logging()
+        self.router = CommandRouter(client, self.prefix)
+        self.metrics = Metrics()
+        self.router.metrics = self.metrics
+        # Подключается к клиенту в load_modules (ACROKA_RATE_LIMIT)
+        self.scheduler = RequestScheduler()
+        # Поток запускается в load_modules (ACROKA_WATCHDOG)
+        self.watchdog = LoopWatchdog(on_offender=self._disable_offender)
+        self.router.register()
+        self.dependencies = DependencyResolver(DEPS_MANIFEST)
+        self.backups = BackupStore(BACKUP_DIR)
+        self.watcher: Optional[ModuleWatcher] = None
+        # Процессы создаются только при первом вызове изолированного модуля
+        self.isolation = IsolatedPool(isolated_workers)
+        self.executors = ExecutorPool()
+        self.http = http or HttpClient()
+    
+    @property
+    def owner_id(self) -> Optional[int]:
+        """ID владельца из кэша данных аккаунта"""
+        return self.identity.id
     
     def _load_prefix(self) -> str:
         """Загрузка префикса из файла"""
@@ -69,43 +153,62 @@ class ModuleManager:
     
     def _setup_logging(self):
         """Настройка логирования"""
-        import logging
-        logger = logging.getLogger('AcrokaUB')
-        logger.setLevel(logging.INFO)
-        
-        if not logger.handlers:
-            # Файловый обработчик
-            file_handler = logging.FileHandler(LOG_FILE, encoding='utf-8')
-            file_handler.setFormatter(logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            ))
-            logger.addHandler(file_handler)
-            
-            # Консольный обработчик
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(logging.Formatter(
-                '%(levelname)s: %(message)s'
-            ))
-            logger.addHandler(console_handler)
-        
-        return logger
+        return setup_logging(LOG_FILE)
     
     async def load_module(self, module_name: str) -> bool:
         """Загрузка модуля"""
+        timings = self.load_timings[module_name] = {}
+        started = time.perf_counter()
         try:
             module_path = MODS_DIR / f"{module_name}.py"
             
             if not module_path.exists():
-                self.logger.error(f"Module {module_name} not found")
+                module_logger(module_name).error(f"Module {module_name} not found")
+                return False
+            
+            if not await self._prepare_module(module_path, timings):
+                return False
+            
+            module_class = self._exec_module(module_name, module_path, timings)
+            if not module_class:
+                return False
+            
+            # Команды становятся доступны только после успешного on_load
+            module_data = self._build_module(module_name, module_class, module_path)
+            if not await self._run_on_load(module_name, module_data, timings):
                 return False
             
+            # Модуль мог быть уже загружен (.lm поверх загруженного, гонка с наблюдателем)
+            await self._retire(module_name, self._commit_module(module_name, module_data))
+            return True
+            
+        except Exception as e:
+            module_logger(module_name).error(f"Error loading module {module_name}: {e}", exc_info=True)
+            return False
+        finally:
+            timings['total'] = time.perf_counter() - started
+            self.index.save()
+    
+    async def _prepare_module(self, module_path: Path, timings: Dict[str, float],
+                              check_dependencies: bool = True) -> bool:
+        """Подготовка модуля: резервная копия и зависимости (ввод-вывод)"""
+        started = time.perf_counter()
+        try:
             # Создаем резервную копию
             await self._create_backup(module_path)
             
             # Проверяем зависимости
-            if not await self._check_dependencies(module_path):
-                return False
-            
+            if check_dependencies:
+                return await self._check_dependencies(module_path)
+            return True
+        finally:
+            timings['prepare'] = time.perf_counter() - started
+    
+    def _exec_module(self, module_name: str, module_path: Path,
+                     timings: Dict[str, float]) -> Optional[type]:
+        """Исполнение кода модуля и поиск класса Module"""
+        started = time.perf_counter()
+        try:
             # Загружаем модуль
             spec = importlib.util.spec_from_file_location(
                 f"modules.{module_name}",
@@ -117,110 +220,140 @@ class ModuleManager:
             # Исполняем модуль
             spec.loader.exec_module(module)
             
-            # Ищем класс модуля
-            module_class = None
+            # Класс модуля известен из индекса, полный перебор - запасной путь
+            meta = self.index.get(module_path)
+            if meta:
+                obj = getattr(module, meta['class'], None)
+                if inspect.isclass(obj) and issubclass(obj, Module) and obj is not Module:
+                    return obj
+            
             for name, obj in inspect.getmembers(module):
                 if (inspect.isclass(obj) and 
                     issubclass(obj, Module) and 
                     obj != Module):
-                    module_class = obj
-                    break
+                    return obj
             
-            if not module_class:
-                self.logger.error(f"No Module class found in {module_name}")
-                return False
+            module_logger(module_name).error(f"No Module class found in {module_name}")
+            return None
+        finally:
+            timings['exec'] = time.perf_counter() - started
+    
+    def _build_module(self, module_name: str, module_class: type, module_path: Path) -> Dict:
+        """Создание экземпляра модуля и его команд без регистрации в роутере"""
+        module_instance = module_class(self.client, self.prefix)
+        module_instance.identity = self.identity
+        module_instance.executor = self.executors.bind(module_name)
+        module_instance.http = self.http
+        
+        # Готовим обработчики команд
+        handlers = []
+        for cmd, description in module_instance.commands.items():
+            handler = module_instance.__class__.__dict__.get(cmd)
             
-            # Создаем экземпляр модуля
-            module_instance = module_class(self.client, self.prefix)
+            if not handler or not callable(handler):
+                module_logger(module_name).warning(f"Module {module_name} has no handler for command {cmd}")
+                continue
+            if not inspect.iscoroutinefunction(handler):
+                raise TypeError(f"Handler {cmd} of module {module_name} must be async")
             
-            # Регистрируем обработчики команд
-            handlers = []
-            for cmd, description in module_instance.commands.items():
-                pattern = rf'^{re.escape(self.prefix)}{cmd}$'
-                handler = module_instance.__class__.__dict__.get(cmd)
-                
-                if handler and callable(handler):
-                    @self.client.on(events.NewMessage(pattern=pattern, outgoing=True))
-                    async def handler_wrapper(event, cmd_handler=handler):
+            async def handler_wrapper(event, cmd_handler=handler, cmd=cmd):
+                module_data['last_used'] = time.monotonic()
+                module_data['running'] += 1
+                try:
+                    if module_instance.isolated:
+                        await self.isolation.run(
+                            module_instance, cmd, event, module_path, module_data['digest']
+                        )
+                    else:
                         await cmd_handler(module_instance, event)
-                    
-                    handlers.append(handler_wrapper)
+                finally:
+                    module_data['running'] -= 1
             
-            # Сохраняем информацию о модуле
-            self.modules[module_name] = {
-                'instance': module_instance,
-                'class': module_class,
-                'path': module_path,
-                'handlers': handlers,
-                'loaded_at': datetime.now(),
-                'info': {
-                    'name': module_instance.name,
-                    'version': module_instance.version,
-                    'author': module_instance.author,
-                    'description': module_instance.description,
-                    'commands': module_instance.commands
-                }
+            handlers.append(self.router.route(cmd, handler_wrapper, owner=module_name))
+        
+        module_data = {
+            'instance': module_instance,
+            'class': module_class,
+            'path': module_path,
+            'handlers': handlers,
+            'loaded_at': datetime.now(),
+            'last_used': time.monotonic(),
+            'running': 0,
+            'digest': self.index.digest(module_path),
+            'info': {
+                'name': module_instance.name,
+                'version': module_instance.version,
+                'author': module_instance.author,
+                'description': module_instance.description,
+                'commands': module_instance.commands
             }
-            
-            # Вызываем on_load
+        }
+        return module_data
+    
+    def _commit_module(self, module_name: str, module_data: Dict) -> Optional[Dict]:
+        """Атомарная активация модуля с заменой предыдущей версии"""
+        previous = self.modules.get(module_name)
+        dormant = self.dormant.pop(module_name, None)
+        self.router.swap((previous or dormant or {}).get('handlers', []), module_data['handlers'])
+        self.modules[module_name] = module_data
+        
+        module_logger(module_name).info(f"Module {module_name} loaded successfully")
+        print(f"✅ [Модуль] {module_name} v{module_data['instance'].version}")
+        return previous
+    
+    async def _retire(self, module_name: str, previous: Optional[Dict]):
+        """on_unload версии, замененной в _commit_module"""
+        if previous is None:
+            return
+        try:
+            await previous['instance'].on_unload()
+        except Exception as e:
+            module_logger(module_name).error(f"Error in on_unload of module {module_name}: {e}")
+    
+    async def _run_on_load(self, module_name: str, module_data: Dict,
+                           timings: Dict[str, float]) -> bool:
+        """Вызов on_load модуля; при ошибке экземпляр сворачивается через on_unload"""
+        module_instance = module_data['instance']
+        started = time.perf_counter()
+        try:
             await module_instance.on_load()
-            
-            self.logger.info(f"Module {module_name} loaded successfully")
-            print(f"✅ [Модуль] {module_name} v{module_instance.version}")
             return True
-            
         except Exception as e:
-            self.logger.error(f"Error loading module {module_name}: {e}", exc_info=True)
+            module_logger(module_name).error(f"Error in on_load of module {module_name}: {e}", exc_info=True)
+            try:
+                await module_instance.on_unload()
+            except Exception as e:
+                module_logger(module_name).error(f"Error in on_unload of module {module_name}: {e}")
             return False
+        finally:
+            timings['on_load'] = time.perf_counter() - started
     
     async def _create_backup(self, module_path: Path):
         """Создание резервной копии модуля"""
         try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_file = BACKUP_DIR / f"{module_path.stem}_{timestamp}.py"
-            shutil.copy2(module_path, backup_file)
+            await self.backups.save_async(module_path, self.index.digest(module_path))
         except Exception as e:
-            self.logger.error(f"Error creating backup: {e}")
+            module_logger(module_path.stem).error(f"Error creating backup: {e}")
     
     async def _check_dependencies(self, module_path: Path) -> bool:
         """Проверка и установка зависимостей"""
         try:
-            with open(module_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Ищем зависимости в комментариях
-            deps_match = re.search(r'#\s*dependencies?:\s*(.+)', content)
-            if not deps_match:
-                return True
-            
-            dependencies = [d.strip() for d in deps_match.group(1).split(',')]
-            if not dependencies:
-                return True
-            
-            print(f"📦 Установка зависимостей: {', '.join(dependencies)}")
-            
-            # Устанавливаем зависимости
-            process = await asyncio.create_subprocess_shell(
-                f'{sys.executable} -m pip install {" ".join(dependencies)}',
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            return not await self.dependencies.resolve(
+                [module_path], {module_path: self.index.digest(module_path)}
             )
-            
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                self.logger.error(f"Dependency installation failed: {stderr.decode()}")
-                return False
-            
-            self.logger.info(f"Dependencies installed: {dependencies}")
-            return True
-            
         except Exception as e:
-            self.logger.error(f"Error checking dependencies: {e}")
+            module_logger(module_path.stem).error(f"Error checking dependencies: {e}")
             return False
     
     async def unload_module(self, module_name: str) -> bool:
         """Выгрузка модуля"""
+        if module_name in self.dormant:
+            for route in self.dormant.pop(module_name)['handlers']:
+                self.router.remove(route)
+            module_logger(module_name).info(f"Module {module_name} unloaded")
+            print(f"🔴 [Модуль] {module_name} выгружен")
+            return True
+        
         if module_name not in self.modules:
             return False
         
@@ -231,8 +364,8 @@ class ModuleManager:
             await module_data['instance'].on_unload()
             
             # Удаляем обработчики
-            for handler in module_data['handlers']:
-                self.client.remove_event_handler(handler)
+            for route in module_data['handlers']:
+                self.router.remove(route)
             
             # Удаляем из кэша
             module_key = f"modules.{module_name}"
@@ -242,59 +375,528 @@ class ModuleManager:
             # Удаляем из словаря модулей
             del self.modules[module_name]
             
-            self.logger.info(f"Module {module_name} unloaded")
+            module_logger(module_name).info(f"Module {module_name} unloaded")
             print(f"🔴 [Модуль] {module_name} выгружен")
             return True
             
         except Exception as e:
-            self.logger.error(f"Error unloading module {module_name}: {e}")
+            module_logger(module_name).error(f"Error unloading module {module_name}: {e}")
             return False
     
     async def reload_module(self, module_name: str) -> bool:
-        """Перезагрузка модуля"""
-        if await self.unload_module(module_name):
-            return await self.load_module(module_name)
-        return False
+        """Перезагрузка модуля
+        
+        Новая версия исполняется, создается и проходит on_load, пока старая
+        продолжает работать. Затем команды подменяются одной синхронной
+        операцией; при любой ошибке остается прежняя версия.
+        """
+        if module_name in self.dormant:
+            # Код ленивого модуля не загружен - достаточно обновить индекс
+            path = self.dormant[module_name]['path']
+            return self._register_dormant(module_name, path) or await self.load_module(module_name)
+        
+        if module_name not in self.modules:
+            return False
+        
+        old_data = self.modules[module_name]
+        module_path = old_data['path']
+        module_key = f"modules.{module_name}"
+        previous = sys.modules.get(module_key)
+        timings = self.load_timings[module_name] = {}
+        started = time.perf_counter()
+        
+        new_data = None
+        try:
+            if await self._prepare_module(module_path, timings):
+                module_class = self._exec_module(module_name, module_path, timings)
+                if module_class:
+                    new_data = self._build_module(module_name, module_class, module_path)
+            if new_data and not await self._run_on_load(module_name, new_data, timings):
+                new_data = None
+        except Exception as e:
+            module_logger(module_name).error(f"Error loading module {module_name}: {e}", exc_info=True)
+            new_data = None
+        finally:
+            timings['total'] = time.perf_counter() - started
+        
+        if new_data is None:
+            if previous is not None:
+                sys.modules[module_key] = previous
+            module_logger(module_name).error(f"Module {module_name} not reloaded, previous version kept")
+            return False
+        
+        new_data['lazy'] = old_data.get('lazy', False)
+        await self._retire(module_name, self._commit_module(module_name, new_data))
+        return True
+    
+    @staticmethod
+    def _meta_info(meta: Dict) -> Dict:
+        """Информация о модуле из индекса (значения по умолчанию - из Module)"""
+        return {
+            'name': meta.get('name', Module.name),
+            'version': meta.get('version', Module.version),
+            'author': meta.get('author', Module.author),
+            'description': meta.get('description', Module.description),
+            'commands': meta.get('commands', {}) if meta['static'] else {}
+        }
+    
+    def _dormant_entry(self, module_name: str, module_path: Path, meta: Dict) -> Dict:
+        """Описание ленивого модуля с командами-заглушками"""
+        handlers = [
+            self.router.route(cmd, self._lazy_handler(module_name), owner=module_name)
+            for cmd in meta.get('commands', {}) if cmd in meta['handlers']
+        ]
+        return {
+            'path': module_path,
+            'handlers': handlers,
+            'meta': meta,
+            'loaded_at': datetime.now(),
+            'info': self._meta_info(meta)
+        }
+    
+    def _register_dormant(self, module_name: str, module_path: Path) -> bool:
+        """Регистрация команд модуля без загрузки его кода"""
+        meta = self.index.get(module_path)
+        if not meta or not meta['static'] or not meta.get('lazy', True):
+            return False
+        
+        entry = self._dormant_entry(module_name, module_path, meta)
+        previous = self.dormant.get(module_name)
+        self.router.swap(previous['handlers'] if previous else [], entry['handlers'])
+        self.dormant[module_name] = entry
+        return True
+    
+    def _lazy_handler(self, module_name: str):
+        """Заглушка команды: активирует модуль и передает ему сообщение"""
+        async def handler(event):
+            if not await self.activate_module(module_name):
+                return
+            for route, match in self.router.resolve(event.raw_text):
+                if route.owner == module_name:
+                    event.pattern_match = match
+                    await route.handler(event)
+        return handler
+    
+    def _module_alias(self, dependency: str) -> Optional[str]:
+        """Имя файла модуля по зависимости (имени файла или Module.name)"""
+        dependency = str(dependency)
+        if dependency in self.modules or dependency in self.dormant:
+            return dependency
+        for name, data in (*self.modules.items(), *self.dormant.items()):
+            if str(data['info']['name']).lower() == dependency.lower():
+                return name
+        return None
+    
+    async def activate_module(self, module_name: str, _chain: frozenset = frozenset()) -> bool:
+        """Загрузка ленивого модуля при первом использовании"""
+        if module_name in self.modules:
+            return True
+        if module_name not in self.dormant:
+            return False
+        
+        pending = self._activating.get(module_name)
+        if pending is None:
+            pending = self._activating[module_name] = asyncio.ensure_future(
+                self._activate(module_name, _chain | {module_name})
+            )
+            pending.add_done_callback(lambda _: self._activating.pop(module_name, None))
+        return await asyncio.shield(pending)
+    
+    async def _activate(self, module_name: str, chain: frozenset) -> bool:
+        started = time.perf_counter()
+        for dependency in self.dormant[module_name]['meta'].get('dependencies', []):
+            target = self._module_alias(dependency)
+            if target and target not in chain:
+                await self.activate_module(target, chain)
+        
+        if not await self.load_module(module_name):
+            module_logger(module_name).error(f"Lazy module {module_name} failed to activate")
+            return False
+        
+        self.modules[module_name]['lazy'] = True
+        module_logger(module_name).info(
+            f"Module {module_name} activated on first use in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return True
+    
+    async def deactivate_module(self, module_name: str) -> bool:
+        """Возврат активированного модуля в ленивое состояние"""
+        module_data = self.modules.get(module_name)
+        if not module_data or module_data['running']:
+            return False
+        
+        # Модуль, от которого зависят загруженные модули, не выгружается
+        for name, data in self.modules.items():
+            if name != module_name and any(
+                self._module_alias(dep) == module_name for dep in data['class'].dependencies or []
+            ):
+                return False
+        
+        meta = self.index.get(module_data['path'])
+        if not meta or not meta['static'] or not meta.get('lazy', True):
+            return False
+        
+        entry = self._dormant_entry(module_name, module_data['path'], meta)
+        self.router.swap(module_data['handlers'], entry['handlers'])
+        del self.modules[module_name]
+        self.dormant[module_name] = entry
+        sys.modules.pop(f"modules.{module_name}", None)
+        
+        try:
+            await module_data['instance'].on_unload()
+        except Exception as e:
+            module_logger(module_name).error(f"Error in on_unload of module {module_name}: {e}")
+        
+        module_logger(module_name).info(f"Module {module_name} deactivated after idle timeout")
+        return True
+    
+    async def _reap_idle(self):
+        """Выгрузка ленивых модулей, не использовавшихся idle_ttl секунд"""
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_ttl / 2))
+            now = time.monotonic()
+            for name, data in list(self.modules.items()):
+                if data.get('lazy') and now - data['last_used'] >= self.idle_ttl:
+                    try:
+                        await self.deactivate_module(name)
+                    except Exception as e:
+                        module_logger(name).error(f"Error deactivating module {name}: {e}", exc_info=True)
+    
+    async def _disable_offender(self, module_name: str):
+        """Выгрузка модуля, который несколько раз заблокировал цикл событий"""
+        if module_name not in self.modules and module_name not in self.dormant:
+            return
+        count = self.watchdog.offenses.pop(module_name, 0)
+        module_logger(module_name).error(f"Module {module_name} disabled: blocked the event loop {count} times")
+        print(f"⛔ [Модуль] {module_name} отключен: блокировал цикл событий {count} раз")
+        await self.unload_module(module_name)
+    
+    def start_watcher(self) -> bool:
+        """Включение автоматической перезагрузки измененных модулей"""
+        if self.watcher is None:
+            self.watcher = ModuleWatcher(self, MODS_DIR)
+        if self.watcher.running:
+            return False
+        self.watcher.start()
+        return True
+    
+    async def stop_watcher(self) -> bool:
+        """Выключение автоматической перезагрузки"""
+        if self.watcher is None or not self.watcher.running:
+            return False
+        await self.watcher.stop()
+        return True
     
     async def load_all_modules(self):
-        """Загрузка всех модулей"""
+        """Загрузка всех модулей
+        
+        Подготовка (резервные копии, зависимости) идет параллельно,
+        исполнение кода и регистрация команд - в детерминированном
+        порядке с учетом Module.dependencies, on_load - параллельно
+        внутри одного уровня графа зависимостей. В ленивом режиме модули,
+        метаданные которых читаются статически, только регистрируют команды.
+        """
         print("\n" + "📦 ЗАГРУЗКА МОДУЛЕЙ".center(50, '─'))
         
-        module_count = 0
-        for file in MODS_DIR.glob("*.py"):
-            if file.name.startswith('_'):
+        started = time.perf_counter()
+        names = sorted(
+            file.stem for file in MODS_DIR.glob("*.py")
+            if not file.name.startswith('_')
+        )
+        timings = {name: {} for name in names}
+        self.load_timings.update(timings)
+        semaphore = asyncio.Semaphore(self.load_concurrency)
+        
+        # Зависимости всех модулей проверяются и ставятся одним вызовом pip;
+        # хэши неизмененных файлов берутся из индекса без чтения
+        paths = [MODS_DIR / f"{name}.py" for name in names]
+        try:
+            unresolved = {path.stem for path in await self.dependencies.resolve(
+                paths, {path: self.index.digest(path) for path in paths}
+            )}
+        except Exception as e:
+            self.logger.error(f"Error checking dependencies: {e}")
+            unresolved = set(names)
+        
+        if self.lazy:
+            for name in names:
+                index_started = time.perf_counter()
+                if name not in unresolved and self._register_dormant(name, MODS_DIR / f"{name}.py"):
+                    timings[name]['index'] = time.perf_counter() - index_started
+        eager = [name for name in names if name not in self.dormant]
+        
+        async def prepare(name: str) -> bool:
+            if name in unresolved:
+                return False
+            async with semaphore:
+                try:
+                    return await self._prepare_module(
+                        MODS_DIR / f"{name}.py", timings[name], check_dependencies=False
+                    )
+                except Exception as e:
+                    module_logger(name).error(f"Error preparing module {name}: {e}", exc_info=True)
+                    return False
+        
+        prepared = await asyncio.gather(*(prepare(name) for name in eager))
+        
+        classes = {}
+        for name, ok in zip(eager, prepared):
+            if not ok:
+                continue
+            try:
+                module_class = self._exec_module(name, MODS_DIR / f"{name}.py", timings[name])
+            except Exception as e:
+                module_logger(name).error(f"Error loading module {name}: {e}", exc_info=True)
                 continue
+            if module_class:
+                classes[name] = module_class
+        
+        graph = self._build_dependency_graph(names, classes)
+        levels, cyclic = self._dependency_levels(graph)
+        for name in sorted(cyclic):
+            module_logger(name).error(f"Module {name} has cyclic dependencies: {sorted(graph[name])}")
+        
+        async def activate(name: str, module_data: Dict) -> bool:
+            async with semaphore:
+                return await self._run_on_load(name, module_data, timings[name])
+        
+        module_count = 0
+        for level in levels:
+            built = {}
+            for name in level:
+                for dep in sorted(graph[name]):
+                    if dep in self.dormant:
+                        await self.activate_module(dep)
+                missing = [dep for dep in sorted(graph[name]) if dep not in self.modules]
+                if missing:
+                    module_logger(name).error(f"Module {name} skipped, dependencies not loaded: {missing}")
+                    continue
+                try:
+                    built[name] = self._build_module(name, classes[name], MODS_DIR / f"{name}.py")
+                except Exception as e:
+                    module_logger(name).error(f"Error loading module {name}: {e}", exc_info=True)
+            
+            results = await asyncio.gather(
+                *(activate(name, module_data) for name, module_data in built.items())
+            )
             
-            module_name = file.stem
-            if await self.load_module(module_name):
-                module_count += 1
+            # Команды регистрируются в детерминированном порядке
+            for (name, module_data), ok in zip(built.items(), results):
+                if ok:
+                    commit_started = time.perf_counter()
+                    await self._retire(name, self._commit_module(name, module_data))
+                    timings[name]['register'] = time.perf_counter() - commit_started
+                    module_count += 1
+        
+        for name in names:
+            timings[name]['total'] = sum(timings[name].values())
         
         print(f"✅ Загружено модулей: {module_count}")
+        if self.dormant:
+            print(f"💤 Отложено до первой команды: {len(self.dormant)}")
+        self._print_load_timings(
+            [name for name in names if name not in self.dormant], timings,
+            time.perf_counter() - started
+        )
+        
+        self.index.save()
+        
+        if self.lazy and self.idle_ttl > 0 and self._reaper is None:
+            self._reaper = asyncio.ensure_future(self._reap_idle())
         print("─" * 50)
     
+    def _build_dependency_graph(self, names: List[str],
+                                classes: Dict[str, type]) -> Dict[str, Set[str]]:
+        """Граф зависимостей между модулями по атрибуту Module.dependencies
+        
+        Учитываются только зависимости, совпадающие с именем файла или
+        атрибутом name другого модуля; остальное считается pip-пакетами.
+        """
+        aliases = {name: name for name in names}
+        for name, module_class in classes.items():
+            aliases.setdefault(str(module_class.name).lower(), name)
+        for name, data in self.dormant.items():
+            aliases.setdefault(str(data['info']['name']).lower(), name)
+        
+        graph = {}
+        for name, module_class in classes.items():
+            deps = set()
+            for dep in module_class.dependencies or []:
+                target = aliases.get(dep) or aliases.get(str(dep).lower())
+                if target and target != name:
+                    deps.add(target)
+            graph[name] = deps
+        return graph
+    
+    @staticmethod
+    def _dependency_levels(graph: Dict[str, Set[str]]) -> Tuple[List[List[str]], Set[str]]:
+        """Разбиение графа на уровни (топологическая сортировка Кана)"""
+        remaining = {name: set(deps) for name, deps in graph.items()}
+        levels = []
+        
+        while remaining:
+            level = sorted(
+                name for name, deps in remaining.items()
+                if not deps & remaining.keys()
+            )
+            if not level:
+                break
+            levels.append(level)
+            for name in level:
+                del remaining[name]
+        
+        return levels, set(remaining)
+    
+    def _print_load_timings(self, names: List[str], timings: Dict[str, Dict[str, float]],
+                            elapsed: float):
+        """Отчет о времени загрузки модулей"""
+        if not names:
+            return
+        
+        print(f"⏱ Время загрузки: {elapsed * 1000:.0f} мс")
+        for name in sorted(names, key=lambda n: timings[n].get('total', 0), reverse=True):
+            phases = timings[name]
+            print(
+                f"   {name:<20} {phases.get('total', 0) * 1000:>7.1f} мс "
+                f"(подготовка {phases.get('prepare', 0) * 1000:.1f}, "
+                f"код {phases.get('exec', 0) * 1000:.1f}, "
+                f"on_load {phases.get('on_load', 0) * 1000:.1f})"
+            )
+            module_logger(name).info(
+                f"Module {name} load timings: "
+                + ', '.join(f"{phase}={value * 1000:.1f}ms" for phase, value in phases.items())
+            )
+    
+    async def shutdown(self):
+        """Остановка фоновых задач, пулов и HTTP-клиента"""
+        await self.stop_watcher()
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        self.watchdog.stop()
+        self.scheduler.close()
+        await self.metrics.stop()
+        self.isolation.close()
+        self.executors.close()
+        await self.http.close()
+    
     def get_module_info(self, module_name: str) -> Optional[Dict]:
         """Получение информации о модуле"""
-        return self.modules.get(module_name, {}).get('info')
+        data = self.modules.get(module_name) or self.dormant.get(module_name, {})
+        return data.get('info')
     
     def list_modules(self) -> List[Dict]:
-        """Список всех модулей"""
-        return [
-            {
-                'name': name,
-                **data['info'],
-                'loaded_at': data['loaded_at']
-            }
-            for name, data in self.modules.items()
-        ]
+        """Список всех модулей
+        
+        Незагруженные файлы из папки модулей описываются по индексу,
+        без импорта их кода.
+        """
+        loaded = {**self.dormant, **self.modules}
+        result = []
+        for path in sorted(MODS_DIR.glob("*.py")):
+            name = path.stem
+            if name.startswith('_'):
+                continue
+            
+            if name in loaded:
+                data = loaded[name]
+                result.append({
+                    'name': name,
+                    **data['info'],
+                    'loaded_at': data['loaded_at'],
+                    'active': name in self.modules,
+                    'loaded': True,
+                    'executor': self.executors.module_stats(name)
+                })
+                continue
+            
+            meta = self.index.get(path)
+            if meta:
+                result.append({
+                    'name': name,
+                    **self._meta_info(meta),
+                    'loaded_at': None,
+                    'active': False,
+                    'loaded': False,
+                    'executor': {}
+                })
+        
+        self.index.save()
+        return result
 
-async def load_modules(client: TelegramClient):
+async def load_modules(client: TelegramClient, load_concurrency: int = DEFAULT_LOAD_CONCURRENCY,
+                       http: Optional[HttpClient] = None):
     """Основная функция загрузки модулей"""
-    manager = ModuleManager(client)
+    lazy = os.getenv('ACROKA_LAZY_MODULES', '').lower() in ('1', 'true', 'yes', 'on')
+    try:
+        idle_ttl = float(os.getenv('ACROKA_LAZY_TTL', DEFAULT_IDLE_TTL))
+    except ValueError:
+        idle_ttl = DEFAULT_IDLE_TTL
+    
+    try:
+        isolated_workers = int(os.getenv('ACROKA_ISOLATED_WORKERS', DEFAULT_ISOLATED_WORKERS))
+    except ValueError:
+        isolated_workers = DEFAULT_ISOLATED_WORKERS
+    
+    try:
+        load_concurrency = int(os.getenv('ACROKA_LOAD_CONCURRENCY', load_concurrency))
+    except ValueError:
+        load_concurrency = DEFAULT_LOAD_CONCURRENCY
+    
+    manager = ModuleManager(client, load_concurrency, lazy=lazy, idle_ttl=idle_ttl,
+                            isolated_workers=isolated_workers, http=http)
+    manager.metrics.instrument(client)
+    
+    # Планировщик оборачивает клиент поверх метрик: время API не включает очередь
+    if os.getenv('ACROKA_RATE_LIMIT', '1').lower() not in ('0', 'false', 'no', 'off'):
+        try:
+            manager.scheduler = RequestScheduler(
+                global_rate=float(os.getenv('ACROKA_RATE_GLOBAL', DEFAULT_GLOBAL_RATE)),
+                chat_rate=float(os.getenv('ACROKA_RATE_CHAT', DEFAULT_CHAT_RATE)),
+                max_flood_wait=client.flood_sleep_threshold
+            )
+        except ValueError:
+            # Нечисловые и неположительные значения (0 - деление на ноль в ведре)
+            manager.logger.error("Invalid ACROKA_RATE_* value, using defaults")
+        manager.scheduler.install(client)
+    try:
+        metrics_port = int(os.getenv('ACROKA_METRICS_PORT', 0))
+    except ValueError:
+        metrics_port = 0
+    try:
+        await manager.metrics.start(
+            file=os.getenv('ACROKA_METRICS_FILE'), port=metrics_port,
+            host=os.getenv('ACROKA_METRICS_HOST', DEFAULT_METRICS_HOST)
+        )
+    except OSError as e:
+        manager.logger.error(f"Error starting metrics export: {e}")
+    
+    if os.getenv('ACROKA_WATCHDOG', '1').lower() not in ('0', 'false', 'no', 'off'):
+        try:
+            manager.watchdog.threshold = float(os.getenv('ACROKA_WATCHDOG_THRESHOLD', DEFAULT_STALL_THRESHOLD))
+            manager.watchdog.disable_after = int(os.getenv('ACROKA_WATCHDOG_DISABLE', 0))
+        except ValueError:
+            manager.logger.error("Invalid ACROKA_WATCHDOG_* value, using defaults")
+        manager.watchdog.start()
+    await manager.identity.refresh()
+    started = time.perf_counter()
+    manager.identity.register()
+    handlers = time.perf_counter() - started
     await manager.load_all_modules()
     
+    if os.getenv('ACROKA_WATCH_MODULES', '').lower() in ('1', 'true', 'yes', 'on'):
+        manager.start_watcher()
+    
     # Загружаем основные команды
     from core.commands import CoreCommands
     core_cmds = CoreCommands(manager, client)
+    started = time.perf_counter()
     await core_cmds.register()
+    handlers += time.perf_counter() - started
     
+    # Регистрация обработчиков: владелец, основные команды и команды модулей
+    manager.startup_timings['handlers'] = handlers + sum(
+        timings.get('register', 0) for timings in manager.load_timings.values()
+    )
     return manager
@@ -0,0 +1,89 @@
+import builtins
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List
+
+DEFAULT_TOP_PACKAGES = 15
+
+
+class ImportProfiler:
+    """Время импорта по пакетам верхнего уровня
+
+    Подменяет builtins.__import__ и учитывает только первый импорт модуля
+    в основном потоке; вложенные импорты вычитаются из времени родителя,
+    поэтому каждый пакет получает собственное время.
+    """
+
+    def __init__(self):
+        self.packages: Dict[str, float] = defaultdict(float)
+        self._original = None
+        self._stack: List[float] = []
+        self._thread = threading.main_thread()
+
+    def install(self):
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules or threading.current_thread() is not self._thread:
+            return self._original(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            self.packages[name.partition('.')[0]] += elapsed - children
+
+
+class StartupProfile:
+    """Профиль запуска: импорты по пакетам и время фаз"""
+
+    def __init__(self):
+        self.imports = ImportProfiler()
+        self.phases: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    def start(self):
+        self.imports.install()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def report(self, top: int = DEFAULT_TOP_PACKAGES) -> str:
+        """Текстовый отчет (мс)"""
+        self.imports.uninstall()
+        packages = sorted(self.imports.packages.items(), key=lambda item: item[1], reverse=True)
+
+        lines = ["⏱ ПРОФИЛЬ ЗАПУСКА".center(50, '─')]
+        lines.append(f"Импорты: {sum(self.imports.packages.values()) * 1000:.0f} мс")
+        for package, seconds in packages[:top]:
+            lines.append(f"   {package:<28} {seconds * 1000:>8.1f} мс")
+
+        lines.append("Фазы:")
+        for name, seconds in self.phases.items():
+            lines.append(f"   {name:<28} {seconds * 1000:>8.1f} мс")
+        lines.append(f"Всего: {(time.perf_counter() - self.started) * 1000:.0f} мс")
+        lines.append("─" * 50)
+        return '\n'.join(lines)
@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.http import HttpClient
+
+DEFAULT_INDEX_TTL = 10 * 60
+DEFAULT_CONCURRENCY = 4
+
+
+class RepositoryError(RuntimeError):
+    """Ошибка работы с репозиторием модулей"""
+
+
+def git_blob_sha(data: bytes) -> str:
+    """sha1 содержимого в формате git-блоба (как в дереве GitHub)"""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+class ModuleRepository:
+    """Репозиторий модулей с локальным кэшем индекса
+
+    Индекс (имя файла -> sha блоба и размер) берется из дерева GitHub,
+    хранится в cache_file и перепроверяется по ETag не чаще раза в ttl
+    секунд. Скачанные файлы сверяются с sha из индекса. Если задан mirror,
+    индекс и файлы берутся из локальной папки без обращения к сети.
+    """
+
+    def __init__(self, http: HttpClient, index_url: str, raw_url: str, cache_file: Path,
+                 mirror: Optional[Path] = None, ttl: float = DEFAULT_INDEX_TTL,
+                 concurrency: int = DEFAULT_CONCURRENCY):
+        self.http = http
+        self.index_url = index_url
+        self.raw_url = raw_url
+        self.cache_file = cache_file
+        self.mirror = mirror
+        self.ttl = ttl
+        self.concurrency = max(1, concurrency)
+        self.logger = logging.getLogger('AcrokaUB')
+        self._cache: Optional[Dict] = None
+
+    def _load_cache(self) -> Dict:
+        if self._cache is None:
+            self._cache = {'files': {}, 'etag': None, 'checked_at': 0}
+            try:
+                if self.cache_file.exists():
+                    self._cache.update(json.loads(self.cache_file.read_text(encoding='utf-8')))
+            except Exception as e:
+                self.logger.error(f"Error reading repository index: {e}")
+        return self._cache
+
+    def _save_cache(self):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            tmp_file.write_text(json.dumps(self._cache, ensure_ascii=False), encoding='utf-8')
+            tmp_file.replace(self.cache_file)
+        except Exception as e:
+            self.logger.error(f"Error saving repository index: {e}")
+
+    def _mirror_index(self) -> Dict[str, Dict]:
+        """Индекс локального зеркала"""
+        files = {}
+        for path in sorted(self.mirror.glob('*.py')):
+            data = path.read_bytes()
+            files[path.name] = {'sha': git_blob_sha(data), 'size': len(data)}
+        return files
+
+    async def index(self, refresh: bool = False) -> Dict[str, Dict]:
+        """Модули репозитория: имя файла -> {'sha', 'size'}"""
+        if self.mirror is not None:
+            return self._mirror_index()
+
+        cache = self._load_cache()
+        if not refresh and cache['files'] and time.time() - cache['checked_at'] < self.ttl:
+            return cache['files']
+
+        headers = {'Accept': 'application/vnd.github+json'}
+        if cache['etag'] and cache['files']:
+            headers['If-None-Match'] = cache['etag']
+
+        try:
+            async with self.http.get(self.index_url, headers=headers) as response:
+                if response.status == 304:
+                    cache['checked_at'] = time.time()
+                    self._save_cache()
+                    return cache['files']
+                if response.status != 200:
+                    raise RepositoryError(f"HTTP {response.status}")
+                tree = await response.json(content_type=None)
+                etag = response.headers.get('ETag')
+        except Exception as e:
+            # Без сети используется последний сохраненный индекс
+            if cache['files']:
+                self.logger.warning(f"Repository index not refreshed, using cached copy: {e}")
+                return cache['files']
+            raise RepositoryError(f"Не удалось получить индекс репозитория: {e}")
+
+        cache['files'] = {
+            item['path']: {'sha': item['sha'], 'size': item.get('size', 0)}
+            for item in tree.get('tree', [])
+            if item.get('type') == 'blob' and item['path'].endswith('.py') and '/' not in item['path']
+        }
+        cache['etag'] = etag
+        cache['checked_at'] = time.time()
+        self._save_cache()
+        return cache['files']
+
+    async def search(self, query: str = '') -> List[Tuple[str, Dict]]:
+        """Поиск модулей по части имени"""
+        query = query.lower()
+        return [(name, entry) for name, entry in sorted((await self.index()).items())
+                if query in name.lower()]
+
+    async def _fetch(self, name: str) -> bytes:
+        if self.mirror is not None:
+            return (self.mirror / name).read_bytes()
+
+        response = await self.http.fetch(f'{self.raw_url}{name}', cache=True)
+        if response.status != 200:
+            raise RepositoryError(f"HTTP {response.status}")
+        return response.body
+
+    async def _download_one(self, name: str, index: Optional[Dict[str, Dict]], target_dir: Path,
+                            semaphore: asyncio.Semaphore,
+                            refresh: Callable[[], Awaitable[Dict[str, Dict]]]) -> Dict:
+        entry = index.get(name) if index is not None else None
+        if index is not None and entry is None:
+            # Модуль мог появиться после сохранения индекса
+            entry = (await refresh()).get(name)
+            if entry is None:
+                return {'status': 'error', 'error': 'нет в репозитории'}
+
+        target = target_dir / name
+        if entry and target.exists() and git_blob_sha(target.read_bytes()) == entry['sha']:
+            return {'status': 'unchanged'}
+
+        async with semaphore:
+            try:
+                data = await self._fetch(name)
+            except Exception as e:
+                return {'status': 'error', 'error': str(e)}
+
+        if entry and git_blob_sha(data) != entry['sha']:
+            # Файл мог быть обновлен после сохранения индекса (TTL кэша)
+            entry = (await refresh()).get(name)
+            if entry is None or git_blob_sha(data) != entry['sha']:
+                return {'status': 'error', 'error': 'контрольная сумма не совпадает'}
+        if entry is None:
+            self.logger.warning(f"Module {name} downloaded without checksum verification")
+
+        tmp_path = target.with_name(f'.{name}.download')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, target)
+        return {'status': 'installed'}
+
+    async def download(self, names: Iterable[str], target_dir: Path) -> Dict[str, Dict]:
+        """Параллельное скачивание модулей с проверкой контрольных сумм
+
+        Файлы записываются атомарно; неизмененные модули не скачиваются.
+        Если модуля нет в кэше индекса или его sha не совпадает, индекс один
+        раз перечитывается: файл мог обновиться в пределах TTL кэша.
+        """
+        names = list(dict.fromkeys(names))
+        try:
+            index = await self.index()
+        except RepositoryError as e:
+            self.logger.warning(str(e))
+            index = None
+
+        # Индекс обновляется не больше одного раза на все скачивания
+        refreshed: Optional[asyncio.Future] = None
+
+        async def refresh() -> Dict[str, Dict]:
+            nonlocal refreshed
+            if refreshed is None:
+                refreshed = asyncio.ensure_future(self.index(refresh=True))
+            try:
+                return await asyncio.shield(refreshed)
+            except RepositoryError:
+                return index or {}
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._download_one(name, index, target_dir, semaphore, refresh) for name in names)
+        )
+        return dict(zip(names, results))
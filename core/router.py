@@ -0,0 +1,149 @@
+import re
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Pattern, Tuple
+from telethon import TelegramClient, events
+from core.metrics import Metrics, update_received
+from core.scheduler import HIGH, request_priority
+
+Handler = Callable[[Any], Awaitable[Any]]
+
+
+class Route:
+    """Описание одной команды в роутере"""
+
+    __slots__ = ('name', 'handler', 'pattern', 'owner')
+
+    def __init__(self, name: str, handler: Handler, pattern: Pattern, owner: Optional[str]):
+        self.name = name
+        self.handler = handler
+        self.pattern = pattern
+        self.owner = owner
+
+
+class CommandRouter:
+    """Единый диспетчер команд: один обработчик NewMessage на все команды"""
+
+    def __init__(self, client: TelegramClient, prefix: str):
+        self.client = client
+        self.prefix = prefix
+        self.routes: Dict[str, List[Route]] = {}
+        self.logger = logging.getLogger('AcrokaUB')
+        # Гистограммы ожидания и выполнения команд (если заданы)
+        self.metrics: Optional[Metrics] = None
+        self._event = None
+
+    def register(self):
+        """Подключение диспетчера к клиенту"""
+        if self._event is None:
+            self._event = events.NewMessage(outgoing=True)
+            self.client.add_event_handler(self._dispatch, self._event)
+
+    def unregister(self):
+        """Отключение диспетчера от клиента"""
+        if self._event is not None:
+            self.client.remove_event_handler(self._dispatch, self._event)
+            self._event = None
+
+    @staticmethod
+    def route(name: str, handler: Handler, args: Optional[str] = None,
+              owner: Optional[str] = None) -> Route:
+        """Создание команды без добавления в роутер
+
+        args - регулярное выражение для аргументов после имени команды,
+        его группы доступны обработчику через event.pattern_match
+        """
+        pattern = re.compile(rf'{re.escape(name)}{args or ""}$')
+        return Route(name, handler, pattern, owner)
+
+    def add(self, name: str, handler: Handler, args: Optional[str] = None,
+            owner: Optional[str] = None) -> Route:
+        """Добавление команды"""
+        route = self.route(name, handler, args, owner)
+        self.routes.setdefault(name, []).append(route)
+        return route
+
+    def swap(self, old: List[Route], new: List[Route]):
+        """Атомарная замена набора команд
+
+        Выполняется синхронно, поэтому между удалением старых и добавлением
+        новых команд не может быть обработано ни одно сообщение.
+        """
+        for route in old:
+            self.remove(route)
+        for route in new:
+            self.routes.setdefault(route.name, []).append(route)
+
+    def remove(self, route: Route) -> bool:
+        """Удаление одной команды"""
+        routes = self.routes.get(route.name)
+        if not routes or route not in routes:
+            return False
+
+        routes.remove(route)
+        if not routes:
+            del self.routes[route.name]
+        return True
+
+    def remove_owner(self, owner: str) -> int:
+        """Удаление всех команд владельца (модуля)"""
+        removed = 0
+        for name in list(self.routes):
+            kept = [r for r in self.routes[name] if r.owner != owner]
+            removed += len(self.routes[name]) - len(kept)
+            if kept:
+                self.routes[name] = kept
+            else:
+                del self.routes[name]
+        return removed
+
+    def resolve(self, text: str) -> List[Tuple[Route, Any]]:
+        """Поиск команд, подходящих под текст сообщения"""
+        if not text or not text.startswith(self.prefix):
+            return []
+
+        body = text[len(self.prefix):]
+        parts = body.split(None, 1)
+        if not parts:
+            return []
+
+        routes = self.routes.get(parts[0])
+        if not routes:
+            return []
+
+        matched = []
+        for route in routes:
+            match = route.pattern.match(body)
+            if match:
+                matched.append((route, match))
+        return matched
+
+    async def _dispatch(self, event):
+        """Единая точка входа для всех исходящих сообщений"""
+        for route, match in self.resolve(event.raw_text):
+            event.pattern_match = match
+            metrics = self.metrics
+            started = time.perf_counter()
+            if metrics is not None:
+                received = update_received.get()
+                if received is not None:
+                    metrics.observe('command_queue', started - received,
+                                    command=route.name, module=route.owner or 'core')
+            # Запросы команд владельца обгоняют фоновые в планировщике
+            lane = request_priority.set(HIGH)
+            try:
+                await route.handler(event)
+            except events.StopPropagation:
+                raise
+            except Exception as e:
+                if metrics is not None:
+                    metrics.inc('command_errors', command=route.name, module=route.owner or 'core')
+                self.logger.error(
+                    f"Error in command {route.name} ({route.owner or 'core'}): {e}",
+                    exc_info=True, extra={'module_name': route.owner or 'core'}
+                )
+            finally:
+                request_priority.reset(lane)
+                if metrics is not None:
+                    metrics.observe('command_time', time.perf_counter() - started,
+                                    command=route.name, module=route.owner or 'core')
@@ -0,0 +1,292 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, Hashable, List, Optional
+
+from telethon import utils
+from telethon.errors import FloodWaitError, SlowModeWaitError
+
+# Очереди приоритета: меньше - раньше
+HIGH = 0
+NORMAL = 1
+BACKGROUND = 2
+LANE_NAMES = {HIGH: 'high', NORMAL: 'normal', BACKGROUND: 'background'}
+
+DEFAULT_GLOBAL_RATE = 25.0
+DEFAULT_GLOBAL_BURST = 30
+DEFAULT_CHAT_RATE = 1.0
+DEFAULT_CHAT_BURST = 3
+# Дольше этого FloodWait не пережидается, а отдается вызывающему коду
+DEFAULT_MAX_FLOOD_WAIT = 60.0
+# Неактивные счетчики чатов удаляются
+CHAT_BUCKET_TTL = 10 * 60
+
+# Запросы, которые создают или меняют сообщения и ограничиваются Telegram
+WRITE_REQUESTS = frozenset((
+    'SendMessageRequest', 'SendMediaRequest', 'SendMultiMediaRequest', 'EditMessageRequest',
+    'ForwardMessagesRequest', 'DeleteMessagesRequest', 'SendReactionRequest',
+))
+
+request_priority = contextvars.ContextVar('request_priority', default=NORMAL)
+
+
+@contextmanager
+def priority(lane: int):
+    """Очередь для запросов внутри блока (и созданных в нем задач)"""
+    token = request_priority.set(lane)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+def background():
+    """Фоновые запросы модуля пропускают команды владельца вперед"""
+    return priority(BACKGROUND)
+
+
+def _check_rate(rate: float) -> float:
+    # При нулевой частоте ready_at делит на ноль, как только ведро опустеет
+    if not 0 < rate < math.inf:
+        raise ValueError(f"Частота запросов должна быть больше 0: {rate}")
+    return rate
+
+
+class TokenBucket:
+    """Ведро токенов: rate запросов в секунду, до burst подряд"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = _check_rate(rate)
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_at(self, now: float) -> float:
+        self._refill(now)
+        return now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class RequestScheduler:
+    """Планировщик исходящих запросов клиента
+
+    Оборачивает client._call. Запросы, создающие и меняющие сообщения,
+    проходят через общее ведро токенов и ведро своего чата; ожидающие
+    запросы выпускаются по приоритету (команды владельца раньше
+    фоновых задач). FloodWait не пережидается внутри Telethon: ограничение
+    записывается в планировщик, запрос повторяется после него, а запросы
+    в другие очереди продолжают обслуживаться.
+    """
+
+    def __init__(self, global_rate: float = DEFAULT_GLOBAL_RATE,
+                 global_burst: float = DEFAULT_GLOBAL_BURST,
+                 chat_rate: float = DEFAULT_CHAT_RATE, chat_burst: float = DEFAULT_CHAT_BURST,
+                 max_flood_wait: float = DEFAULT_MAX_FLOOD_WAIT):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate = _check_rate(chat_rate)
+        self.chat_burst = chat_burst
+        self.max_flood_wait = max_flood_wait
+        self.logger = logging.getLogger('AcrokaUB')
+        self.chats: Dict[Hashable, TokenBucket] = {}
+        # Запрет на запросы после FloodWait: общий и по чатам (медленный режим)
+        self.paused_until = 0.0
+        self.chat_paused: Dict[Hashable, float] = {}
+        self.stats = {
+            'requests': 0, 'scheduled': 0, 'waited': 0, 'wait': 0.0, 'max_wait': 0.0,
+            'flood_waits': 0, 'flood_wait_time': 0.0, 'max_depth': 0,
+            'lanes': {name: {'queued': 0, 'max_queued': 0, 'waited': 0, 'wait': 0.0}
+                      for name in LANE_NAMES.values()}
+        }
+        self._queue: List[list] = []
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._client = None
+
+    def install(self, client):
+        """Подключение к клиенту"""
+        if self._client is not None:
+            return
+        self._client = client
+        call = client._call
+        # Telethon сравнивает FloodWait с атрибутом клиента: при 0 ошибка
+        # сразу попадает в планировщик, и он сам решает, сколько ждать
+        client.flood_sleep_threshold = 0
+
+        async def scheduled_call(sender, request, ordered=False, flood_sleep_threshold=None):
+            return await self.call(call, sender, request, ordered, flood_sleep_threshold)
+
+        client._call = scheduled_call
+
+    @staticmethod
+    def _chat_key(request) -> Optional[Hashable]:
+        peer = getattr(request, 'peer', None) or getattr(request, 'to_peer', None)
+        if peer is None:
+            return None
+        try:
+            return utils.get_peer_id(peer)
+        except (TypeError, ValueError):
+            # InputPeerSelf и подобные
+            return type(peer).__name__
+
+    async def call(self, call, sender, request, ordered=False, flood_sleep_threshold=None):
+        """Выполнение запроса с учетом ограничений"""
+        max_wait = self.max_flood_wait if flood_sleep_threshold is None else flood_sleep_threshold
+        first = request[0] if isinstance(request, (list, tuple)) and request else request
+        write = type(first).__name__ in WRITE_REQUESTS
+        chat = self._chat_key(first) if write else None
+        self.stats['requests'] += 1
+
+        while True:
+            if write:
+                await self._acquire(chat, request_priority.get())
+            try:
+                # Telethon не спит на FloodWait - ожиданием управляет планировщик
+                return await call(sender, request, ordered, 0)
+            except (FloodWaitError, SlowModeWaitError) as e:
+                seconds = max(1, e.seconds)
+                self.stats['flood_waits'] += 1
+                if seconds > max_wait:
+                    raise
+                self.stats['flood_wait_time'] += seconds
+                self.logger.warning(
+                    f"Flood wait {seconds}s on {type(first).__name__}, request rescheduled"
+                )
+                until = time.monotonic() + seconds
+                if not write:
+                    await asyncio.sleep(seconds)
+                elif isinstance(e, SlowModeWaitError):
+                    self.chat_paused[chat] = max(self.chat_paused.get(chat, 0.0), until)
+                else:
+                    self.paused_until = max(self.paused_until, until)
+
+    def _ready_at(self, chat: Optional[Hashable], now: float) -> float:
+        ready = max(now, self.paused_until, self.global_bucket.ready_at(now))
+        if chat is not None:
+            ready = max(ready, self.chat_paused.get(chat, 0.0), self._bucket(chat).ready_at(now))
+        return ready
+
+    def _bucket(self, chat: Hashable) -> TokenBucket:
+        bucket = self.chats.get(chat)
+        if bucket is None:
+            bucket = self.chats[chat] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _take(self, chat: Optional[Hashable], now: float):
+        self.global_bucket.take(now)
+        if chat is not None:
+            self._bucket(chat).take(now)
+
+    async def _acquire(self, chat: Optional[Hashable], lane: int):
+        """Ожидание своей очереди на отправку"""
+        now = time.monotonic()
+        # Без очереди и с доступными токенами запрос уходит сразу
+        if not self._queue and self._ready_at(chat, now) <= now:
+            self._take(chat, now)
+            return
+
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        entry = [lane, next(self._counter), chat, future, now]
+        heapq.heappush(self._queue, entry)
+
+        lane_stats = self.stats['lanes'][LANE_NAMES.get(lane, 'normal')]
+        lane_stats['queued'] += 1
+        lane_stats['max_queued'] = max(lane_stats['max_queued'], lane_stats['queued'])
+        self.stats['max_depth'] = max(self.stats['max_depth'], len(self._queue))
+        self.stats['scheduled'] += 1
+        self._wake()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            raise
+        finally:
+            lane_stats['queued'] -= 1
+
+        waited = time.monotonic() - now
+        lane_stats['waited'] += 1
+        lane_stats['wait'] += waited
+        self.stats['waited'] += 1
+        self.stats['wait'] += waited
+        self.stats['max_wait'] = max(self.stats['max_wait'], waited)
+
+    def _wake(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._release())
+
+    async def _release(self):
+        """Выпуск ожидающих запросов по приоритету, когда позволяют ведра"""
+        while self._queue:
+            now = time.monotonic()
+            earliest = None
+            # Первый по приоритету запрос, который можно отправить; запросы
+            # в ограниченные чаты не задерживают запросы в другие чаты
+            for entry in sorted(self._queue):
+                lane, _, chat, future, _ = entry
+                if future.done():
+                    continue
+                ready = self._ready_at(chat, now)
+                if ready <= now:
+                    self._take(chat, now)
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    future.set_result(None)
+                    earliest = None
+                    break
+                earliest = ready if earliest is None else min(earliest, ready)
+            else:
+                self._queue = [entry for entry in self._queue if not entry[3].done()]
+                heapq.heapify(self._queue)
+                if earliest is None:
+                    continue
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), earliest - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            # Отпущенный запрос должен успеть выполниться до следующего
+            await asyncio.sleep(0)
+
+        self._prune()
+
+    def _prune(self):
+        """Удаление ведер давно неактивных чатов"""
+        expire = time.monotonic() - CHAT_BUCKET_TTL
+        for chat in [c for c, bucket in self.chats.items() if bucket.updated < expire]:
+            del self.chats[chat]
+        for chat in [c for c, until in self.chat_paused.items() if until < time.monotonic()]:
+            del self.chat_paused[chat]
+
+    def queue_depth(self) -> Dict[str, int]:
+        return {name: stats['queued'] for name, stats in self.stats['lanes'].items()}
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for entry in self._queue:
+            if not entry[3].done():
+                entry[3].cancel()
+        self._queue.clear()
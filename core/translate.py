@@ -0,0 +1,159 @@
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_CACHE_SIZE = 512
+DEFAULT_TTL = 60 * 60
+DEFAULT_BATCH_WINDOW = 0.05
+DEFAULT_MAX_BATCH = 16
+
+
+class TranslationResult(NamedTuple):
+    text: str
+    src: str
+    dest: str
+
+
+class GoogleBackend:
+    """Бэкенд googletrans с одним постоянным клиентом"""
+
+    def __init__(self):
+        self._translator = None
+
+    def translate_batch(self, texts: List[str], dest: str) -> List[TranslationResult]:
+        """Блокирующий перевод списка строк (выполняется в пуле потоков)"""
+        if self._translator is None:
+            from googletrans import Translator
+            self._translator = Translator()
+
+        results = self._translator.translate(texts, dest=dest)
+        return [TranslationResult(r.text, r.src, dest) for r in results]
+
+
+class StaticBackend:
+    """Локальная замена переводчика для тестов и работы без сети"""
+
+    def __init__(self, func: Optional[Callable[[str, str], str]] = None, src: str = 'auto'):
+        self.func = func or (lambda text, dest: text)
+        self.src = src
+        self.calls: List[Tuple[Tuple[str, ...], str]] = []
+
+    def translate_batch(self, texts: List[str], dest: str) -> List[TranslationResult]:
+        self.calls.append((tuple(texts), dest))
+        return [TranslationResult(self.func(text, dest), self.src, dest) for text in texts]
+
+
+class TTLCache:
+    """LRU-кэш с ограничением времени жизни записей"""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, Tuple[float, object]]' = OrderedDict()
+
+    def get(self, key: Hashable):
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TranslationService:
+    """Асинхронный переводчик с кэшем и объединением запросов
+
+    Запросы к одному языку, пришедшие в течение batch_window, уходят
+    в бэкенд одним пакетом; одинаковые тексты переводятся один раз.
+    """
+
+    def __init__(self, backend=None, cache_size: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_TTL,
+                 batch_window: float = DEFAULT_BATCH_WINDOW, max_batch: int = DEFAULT_MAX_BATCH):
+        self.backend = backend or GoogleBackend()
+        self.cache = TTLCache(cache_size, ttl)
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='translate')
+        self._pending: Dict[str, Dict[str, asyncio.Future]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+
+    async def translate(self, text: str, dest: str) -> TranslationResult:
+        """Перевод текста на язык dest"""
+        dest = dest.lower()
+        cached = self.cache.get((text, dest))
+        if cached is not None:
+            return cached
+
+        batch = self._pending.get(dest)
+        if batch is None:
+            batch = self._pending[dest] = {}
+            self._timers[dest] = asyncio.get_event_loop().call_later(
+                self.batch_window, self._flush, dest
+            )
+
+        future = batch.get(text)
+        if future is None:
+            future = batch[text] = asyncio.get_event_loop().create_future()
+            if len(batch) >= self.max_batch:
+                self._flush(dest)
+
+        return await asyncio.shield(future)
+
+    def _flush(self, dest: str):
+        # Пакет, отправленный раньше по max_batch, не должен оставлять таймер
+        # для следующего пакета этого языка
+        timer = self._timers.pop(dest, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(dest, None)
+        if batch:
+            asyncio.ensure_future(self._run_batch(dest, batch))
+
+    async def _run_batch(self, dest: str, batch: Dict[str, asyncio.Future]):
+        texts = list(batch)
+        loop = asyncio.get_event_loop()
+
+        try:
+            results = await loop.run_in_executor(
+                self._executor, self.backend.translate_batch, texts, dest
+            )
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, result in zip(texts, results):
+            self.cache.set((text, dest), result)
+            if not batch[text].done():
+                batch[text].set_result(result)
+
+        # Бэкенд вернул меньше результатов, чем текстов
+        missing = [future for future in batch.values() if not future.done()]
+        if missing:
+            error = RuntimeError(f"Переводчик вернул {len(results)} результатов из {len(texts)}")
+            for future in missing:
+                future.set_exception(error)
+
+    def close(self):
+        """Остановка пула потоков"""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Файлы и папки репозитория, которые обновление не трогает
+EXCLUDED_PREFIXES = ('source/', '.git/', '.github/')
+# Модули ядра, которые можно перезагрузить без перезапуска процесса
+HOT_RELOADABLE = ('core/calc.py', 'core/translate.py', 'core/commands.py')
+REQUIREMENTS_FILE = 'requirements.txt'
+
+
+class UpdateError(RuntimeError):
+    """Ошибка обновления"""
+
+
+class Updater:
+    """Инкрементальное обновление из постоянной git-копии репозитория
+
+    Копия хранится в checkout_dir и при каждом обновлении догружает
+    только новые объекты. В рабочую папку бота атомарно записываются
+    лишь изменившиеся файлы.
+    """
+
+    def __init__(self, repo_url: str, base_dir: Path, checkout_dir: Path, branch: str = 'main'):
+        self.repo_url = repo_url
+        self.base_dir = base_dir
+        self.checkout_dir = checkout_dir
+        self.branch = branch
+        self.logger = logging.getLogger('AcrokaUB')
+
+    async def _git(self, *args: str) -> str:
+        """Запуск git в папке копии"""
+        process = await asyncio.create_subprocess_exec(
+            'git', *args,
+            cwd=str(self.checkout_dir) if (self.checkout_dir / '.git').exists() else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise UpdateError(stderr.decode(errors='replace').strip() or f"git {args[0]} failed")
+        return stdout.decode(errors='replace')
+
+    async def fetch(self) -> Tuple[Optional[str], str]:
+        """Получение новых объектов; возвращает (старый коммит, новый коммит)"""
+        if not (self.checkout_dir / '.git').exists():
+            self.checkout_dir.parent.mkdir(parents=True, exist_ok=True)
+            await self._git('clone', '--depth=1', '--branch', self.branch,
+                            self.repo_url, str(self.checkout_dir))
+            return None, (await self._git('rev-parse', 'HEAD')).strip()
+
+        old = (await self._git('rev-parse', 'HEAD')).strip()
+        await self._git('fetch', '--depth=1', 'origin', self.branch)
+        new = (await self._git('rev-parse', 'FETCH_HEAD')).strip()
+        return old, new
+
+    async def _tree(self, commit: str) -> Dict[str, Tuple[str, str]]:
+        """Файлы коммита: путь -> (режим, sha блоба)"""
+        tree = {}
+        for line in (await self._git('ls-tree', '-r', '-z', commit)).split('\0'):
+            if not line:
+                continue
+            info, path = line.split('\t', 1)
+            mode, _, sha = info.split()
+            tree[path] = (mode, sha)
+        return tree
+
+    async def _changed_paths(self, old: Optional[str], new: str) -> Tuple[List[str], List[str]]:
+        """Изменившиеся и удаленные файлы между коммитами"""
+        if old is None:
+            return sorted((await self._tree(new)).keys()), []
+
+        changed, deleted = [], []
+        output = await self._git('diff', '--name-status', '--no-renames', '-z', old, new)
+        parts = [p for p in output.split('\0') if p]
+        for status, path in zip(parts[::2], parts[1::2]):
+            (deleted if status == 'D' else changed).append(path)
+        return changed, deleted
+
+    @staticmethod
+    def _is_excluded(path: str) -> bool:
+        return path.startswith(EXCLUDED_PREFIXES) or '__pycache__' in path.split('/')
+
+    def _local_blob_sha(self, path: str) -> Optional[str]:
+        """sha1 локального файла в формате git-блоба"""
+        try:
+            data = (self.base_dir / path).read_bytes()
+        except OSError:
+            return None
+        return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+    async def _write_file(self, commit: str, path: str, mode: str):
+        """Атомарная запись файла из коммита"""
+        process = await asyncio.create_subprocess_exec(
+            'git', 'cat-file', 'blob', f'{commit}:{path}',
+            cwd=str(self.checkout_dir),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        content, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise UpdateError(stderr.decode(errors='replace').strip())
+
+        target = self.base_dir / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f'.{target.name}.update')
+        tmp_path.write_bytes(content)
+        if mode == '100755':
+            os.chmod(tmp_path, 0o755)
+        os.replace(tmp_path, target)
+
+    async def update(self) -> Dict:
+        """Обновление рабочей папки до последнего коммита ветки"""
+        old, new = await self.fetch()
+        result = {'old': old, 'new': new, 'changed': [], 'deleted': [],
+                  'requirements': False, 'requirements_ok': True, 'restart': False, 'reload': []}
+        if old == new:
+            return result
+
+        changed, deleted = await self._changed_paths(old, new)
+        tree = await self._tree(new)
+
+        for path in changed:
+            if self._is_excluded(path) or path not in tree:
+                continue
+            mode, sha = tree[path]
+            if mode == '160000' or self._local_blob_sha(path) == sha:
+                continue
+            await self._write_file(new, path, mode)
+            result['changed'].append(path)
+
+        for path in deleted:
+            target = self.base_dir / path
+            if not self._is_excluded(path) and target.is_file():
+                target.unlink()
+                result['deleted'].append(path)
+
+        if old is not None:
+            await self._git('reset', '--hard', new)
+
+        touched = result['changed'] + result['deleted']
+        result['requirements'] = REQUIREMENTS_FILE in touched
+        if result['requirements']:
+            result['requirements_ok'] = await self.install_requirements()
+
+        python_files = [path for path in touched if path.endswith('.py')]
+        result['restart'] = any(path not in HOT_RELOADABLE for path in python_files)
+        result['reload'] = [path for path in HOT_RELOADABLE if path in python_files]
+
+        self.logger.info(
+            f"Updated {old or 'initial'} -> {new}: {len(result['changed'])} changed, "
+            f"{len(result['deleted'])} deleted"
+        )
+        return result
+
+    async def install_requirements(self) -> bool:
+        """Установка зависимостей из обновленного requirements.txt (True при успехе)"""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, '-m', 'pip', 'install', '-r', str(self.base_dir / REQUIREMENTS_FILE),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:
+            self.logger.error(f"Requirements installation failed: {e}")
+            return False
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            self.logger.error(f"Requirements installation failed: {stderr.decode(errors='replace')}")
+            return False
+        return True
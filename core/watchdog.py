@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Dict, Optional, Tuple
+
+from core.router import CommandRouter
+
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_INTERVAL = 0.1
+DEFAULT_LOG_INTERVAL = 60.0
+# Сколько последних кадров стека попадает в лог
+STACK_LIMIT = 12
+
+_DISPATCH_CODE = CommandRouter._dispatch.__code__
+
+
+class LoopWatchdog:
+    """Сторожевой поток для цикла событий
+
+    Поток раз в interval ставит в цикл пустой вызов. Если он не выполнен
+    за threshold секунд, цикл заблокирован: поток снимает стек потока
+    цикла и по кадру CommandRouter._dispatch определяет модуль и команду.
+    Сообщения об одной команде пишутся не чаще раза в log_interval; модуль,
+    заблокировавший цикл disable_after раз, передается в on_offender.
+    В самом цикле наблюдение ничего не стоит - обработчики не оборачиваются.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, interval: float = DEFAULT_INTERVAL,
+                 log_interval: float = DEFAULT_LOG_INTERVAL, disable_after: int = 0,
+                 on_offender: Optional[Callable[[str], object]] = None):
+        self.threshold = threshold
+        self.interval = interval
+        self.log_interval = log_interval
+        self.disable_after = disable_after
+        self.on_offender = on_offender
+        self.logger = logging.getLogger('AcrokaUB')
+        self.stats = {'stalls': 0, 'max_stall': 0.0, 'last': None}
+        self.offenses: Dict[str, int] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._posted: Optional[float] = None
+        self._stall: Optional[Dict] = None
+        self._logged: Dict[Tuple[str, str], float] = {}
+        self._suppressed: Dict[Tuple[str, str], int] = {}
+
+    def start(self):
+        """Запуск (вызывается из потока цикла событий)"""
+        if self._thread is not None:
+            return
+        self.loop = asyncio.get_event_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='loop-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(1)
+            self._thread = None
+
+    def _beat(self):
+        """Выполняется в цикле: цикл снова свободен"""
+        posted, self._posted = self._posted, None
+        stall, self._stall = self._stall, None
+        if stall is None or posted is None:
+            return
+
+        duration = time.monotonic() - posted
+        stall['duration'] = duration
+        self.stats['max_stall'] = max(self.stats['max_stall'], duration)
+        if stall['logged']:
+            self.logger.warning(
+                f"Event loop unblocked after {duration:.2f}s "
+                f"({stall['module'] or 'unknown'}.{stall['command'] or '?'})",
+                extra={'module_name': stall['module']}
+            )
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self._check():
+                    return
+            except Exception as e:
+                # Ошибка одной проверки не должна останавливать наблюдение
+                self.logger.error(f"Loop watchdog error: {e}", exc_info=True)
+
+    def _check(self) -> bool:
+        """Одна проверка; False - цикл закрыт и наблюдение завершается"""
+        # _beat в потоке цикла может сбросить _posted в любой момент
+        posted = self._posted
+        if posted is None:
+            self._posted = time.monotonic()
+            try:
+                self.loop.call_soon_threadsafe(self._beat)
+            except RuntimeError:
+                # Цикл закрыт
+                return False
+            return True
+
+        blocked = time.monotonic() - posted
+        if self._stall is None and blocked >= self.threshold:
+            self._stall = self._capture(blocked)
+            self._report(self._stall)
+        return True
+
+    def _capture(self, blocked: float) -> Dict:
+        """Стек потока цикла и команда, которая его заблокировала"""
+        frame = sys._current_frames().get(self._loop_thread)
+        module = command = None
+        current = frame
+        while current is not None:
+            if current.f_code is _DISPATCH_CODE:
+                route = current.f_locals.get('route')
+                if route is not None:
+                    module, command = route.owner or 'core', route.name
+                break
+            current = current.f_back
+
+        stack = ''.join(traceback.format_stack(frame, STACK_LIMIT)) if frame is not None else ''
+        stall = {'module': module, 'command': command, 'blocked': blocked,
+                 'duration': blocked, 'stack': stack, 'at': time.time(), 'logged': False}
+        self.stats['stalls'] += 1
+        self.stats['last'] = stall
+        return stall
+
+    def _report(self, stall: Dict):
+        """Запись в лог с ограничением частоты и учет повторных нарушителей"""
+        key = (stall['module'] or 'unknown', stall['command'] or '?')
+        now = time.monotonic()
+        if now - self._logged.get(key, -self.log_interval) < self.log_interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+        else:
+            suppressed = self._suppressed.pop(key, 0)
+            self._logged[key] = now
+            stall['logged'] = True
+            self.logger.warning(
+                f"Event loop blocked for over {stall['blocked']:.2f}s by {key[0]}.{key[1]}"
+                + (f" ({suppressed} similar suppressed)" if suppressed else '')
+                + f"\n{stall['stack']}",
+                extra={'module_name': stall['module']}
+            )
+
+        module = stall['module']
+        if module and module != 'core' and self.disable_after > 0:
+            self.offenses[module] = self.offenses.get(module, 0) + 1
+            if self.offenses[module] == self.disable_after and self.on_offender is not None:
+                # Выполнится, когда цикл освободится
+                self.loop.call_soon_threadsafe(self._offender, module)
+
+    def _offender(self, module: str):
+        result = self.on_offender(module)
+        if asyncio.iscoroutine(result):
+            asyncio.ensure_future(result)
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Снимок папки модулей - это один scandir, опрос 20 раз в секунду почти
+# бесплатен; изменение применяется примерно через 50-100 мс после записи
+DEFAULT_INTERVAL = 0.05
+DEFAULT_DEBOUNCE = 0.04
+
+
+class ModuleWatcher:
+    """Отслеживание изменений в папке модулей (опрос mtime с debounce)
+
+    Измененный модуль перезагружается, новый - загружается, удаленный -
+    выгружается. Соединение с Telegram при этом не переподключается.
+    """
+
+    def __init__(self, manager, directory: Path, interval: float = DEFAULT_INTERVAL,
+                 debounce: float = DEFAULT_DEBOUNCE):
+        self.manager = manager
+        self.directory = directory
+        self.interval = interval
+        self.debounce = debounce
+        self.logger = logging.getLogger('AcrokaUB')
+        self._task: Optional[asyncio.Task] = None
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self._pending: Dict[str, float] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Запуск наблюдения"""
+        if not self.running:
+            self._files = self._scan()
+            self._task = asyncio.ensure_future(self._run())
+            self.logger.info(f"Module watcher started for {self.directory}")
+
+    async def stop(self):
+        """Остановка наблюдения"""
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._pending.clear()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Снимок папки: имя модуля -> (mtime_ns, размер)"""
+        files = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.py') and not entry.name.startswith('_') and entry.is_file():
+                        stat = entry.stat()
+                        files[entry.name[:-3]] = (stat.st_mtime_ns, stat.st_size)
+        except OSError as e:
+            self.logger.error(f"Error scanning {self.directory}: {e}")
+        return files
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self._poll()
+            except Exception as e:
+                self.logger.error(f"Module watcher error: {e}", exc_info=True)
+
+    async def _poll(self):
+        files = self._scan()
+        now = time.monotonic()
+
+        # Любое изменение откладывает обработку файла еще на debounce секунд
+        for name in files.keys() | self._files.keys():
+            if files.get(name) != self._files.get(name):
+                self._pending[name] = now
+        self._files = files
+
+        for name, changed_at in list(self._pending.items()):
+            if now - changed_at >= self.debounce:
+                del self._pending[name]
+                await self._handle(name, name in files)
+
+    async def _handle(self, name: str, exists: bool):
+        """Применение изменения одного модуля"""
+        loaded = self.manager.modules.get(name) or self.manager.dormant.get(name)
+        started = time.perf_counter()
+
+        if not exists:
+            if loaded:
+                await self.manager.unload_module(name)
+                self.logger.info(f"Module {name} removed from disk, unloaded")
+            return
+
+        if loaded:
+            # Файл уже загружен после последнего изменения (.lm, .dlm, .restore)
+            mtime = self._files[name][0] / 1e9
+            if loaded['loaded_at'].timestamp() >= mtime:
+                return
+            ok = await self.manager.reload_module(name)
+            action = 'reloaded'
+        else:
+            ok = await self.manager.load_module(name)
+            action = 'loaded'
+
+        elapsed = (time.perf_counter() - started) * 1000
+        if ok:
+            self.logger.info(f"Module {name} {action} by watcher in {elapsed:.1f} ms")
+        else:
+            self.logger.error(f"Module {name} changed on disk but was not {action}")
@@ -5,10 +5,19 @@ Acroka UserBot v3.0
 """
 
 import asyncio
+import contextlib
 import sys
 import os
 import traceback
 from pathlib import Path
+
+# --profile-startup: время импортов по пакетам и фаз запуска, затем выход
+STARTUP_PROFILE = None
+if '--profile-startup' in sys.argv:
+    from core.profiling import StartupProfile
+    STARTUP_PROFILE = StartupProfile()
+    STARTUP_PROFILE.start()
+
 from colorama import init, Fore, Style
 
 # Добавляем путь к проекту в PYTHONPATH
@@ -68,7 +77,7 @@ python-dotenv==1.0.1""")
     
     return True
 
-async def load_modules_directly(client):
+async def load_modules_directly(client, http=None):
     """Прямая загрузка модулей (обходная функция)"""
     print(f"{Fore.CYAN}📦 Загрузка модулей...{Style.RESET_ALL}")
     
@@ -76,7 +85,7 @@ async def load_modules_directly(client):
         # Пробуем импортировать из новой структуры
         try:
             from core.modules import load_modules
-            manager = await load_modules(client)
+            manager = await load_modules(client, http=http)
             print(f"{Fore.GREEN}✅ Модули загружены (новая структура){Style.RESET_ALL}")
             return manager
         except ImportError as e:
@@ -140,6 +149,10 @@ async def load_modules_directly(client):
         traceback.print_exc()
         return None
 
+def phase(profile, name: str):
+    """Замер фазы запуска (без --profile-startup ничего не делает)"""
+    return profile.phase(name) if profile is not None else contextlib.nullcontext()
+
 async def main():
     """Основная функция запуска"""
     print_banner()
@@ -148,30 +161,40 @@ async def main():
         print(f"{Fore.RED}❌ Не удалось проверить зависимости{Style.RESET_ALL}")
         return
     
+    manager = module_manager = None
+    profile = STARTUP_PROFILE
     try:
         print(f"{Fore.GREEN}🚀 Инициализация бота...{Style.RESET_ALL}")
         
-        # Импортируем менеджер бота
-        from core.bot_manager import BotManager
-        
-        # Создаем менеджер
-        manager = BotManager()
+        # Импортируем менеджер бота и создаем его (чтение конфигурации и клиент)
+        with phase(profile, 'config'):
+            from core.bot_manager import BotManager
+            manager = BotManager()
         
         # Инициализируем бота
-        if not await manager.initialize_bot():
+        with phase(profile, 'client start'):
+            initialized = await manager.initialize_bot()
+        if not initialized:
             print(f"{Fore.RED}❌ Не удалось инициализировать бота{Style.RESET_ALL}")
             return
         
         print(f"{Fore.GREEN}✅ Бот инициализирован{Style.RESET_ALL}")
         
         # Прямая загрузка модулей
-        module_manager = await load_modules_directly(manager.client)
+        with phase(profile, 'module load'):
+            module_manager = await load_modules_directly(manager.client, manager.http)
+        
+        if profile is not None:
+            registration = getattr(module_manager, 'startup_timings', {}).get('handlers')
+            if registration is not None:
+                profile.add('handler registration', registration)
+            print(profile.report())
+            return
         
         if module_manager:
-            # Устанавливаем владельца
-            me = await manager.client.get_me()
-            if hasattr(module_manager, 'owner_id'):
-                module_manager.owner_id = me.id
+            # Данные владельца уже закэшированы менеджером модулей
+            identity = getattr(module_manager, 'identity', None)
+            me = identity.me if identity and identity.me else await manager.client.get_me()
             
             print(f"{Fore.GREEN}👤 Владелец: {me.first_name} (ID: {me.id}){Style.RESET_ALL}")
         
@@ -196,6 +219,10 @@ async def main():
         traceback.print_exc()
     
     finally:
+        if hasattr(module_manager, 'shutdown'):
+            await module_manager.shutdown()
+        if manager is not None:
+            await manager.http.close()
         print(f"\n{Fore.CYAN}👋 До свидания!{Style.RESET_ALL}")
 
 if __name__ == '__main__':